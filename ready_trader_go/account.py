@@ -34,6 +34,7 @@ class CompetitorAccount(object):
         self.sell_volume: int = 0
         self.tick_size: int = int(tick_size * 100.0)
         self.total_fees: int = 0
+        self.turnover: int = 0
 
     def transact(self, instrument: Instrument, side: Side, price: float, volume: int, fee: int) -> None:
         """Update this account with the specified transaction."""
@@ -44,6 +45,7 @@ class CompetitorAccount(object):
 
         self.account_balance -= fee
         self.total_fees += fee
+        self.turnover += round(price * volume)
 
         if instrument == Instrument.FUTURE:
             if side == Side.SELL:
@@ -26,7 +26,7 @@ from .information import InformationPublisher
 from .market_events import MarketEventsReader
 from .match_events import MatchEventsWriter
 from .score_board import ScoreBoardWriter
-from .timer import Timer
+from .timer import Timer, VirtualClock
 from .types import IController
 
 
@@ -35,7 +35,8 @@ class Controller(IController):
 
     def __init__(self, market_open_delay: float, exec_server: ExecutionServer, info_publisher: InformationPublisher,
                  market_events_reader: MarketEventsReader, match_events_writer: MatchEventsWriter,
-                 score_board_writer: ScoreBoardWriter, market_timer: Timer, tick_timer: Timer):
+                 score_board_writer: ScoreBoardWriter, market_timer: Timer, tick_timer: Timer,
+                 virtual_clock: Optional[VirtualClock] = None):
         """Initialise a new instance of the Controller class."""
         self.heads_up_display_server: Optional[HeadsUpDisplayServer] = None
 
@@ -49,6 +50,7 @@ class Controller(IController):
         self.__match_events_writer = match_events_writer
         self.__score_board_writer = score_board_writer
         self.__tick_timer: Timer = tick_timer
+        self.__virtual_clock: Optional[VirtualClock] = virtual_clock
 
         # Connect signals
         self.__match_events_writer.task_complete.append(self.on_task_complete)
@@ -90,6 +92,8 @@ class Controller(IController):
 
     def on_tick_timer_stopped(self, timer: Timer, now: float) -> None:
         """Shut down the match."""
+        if self.__virtual_clock:
+            self.__virtual_clock.stop()
         self.__match_events_writer.finish()
         self.__score_board_writer.finish()
 
@@ -99,6 +103,10 @@ class Controller(IController):
             timer.shutdown(now, "match complete")
             return
 
+        # Match events and score records are passed to the writer threads once per tick
+        self.__match_events_writer.flush()
+        self.__score_board_writer.flush()
+
     async def start(self) -> None:
         """Start running the match."""
         self.__logger.info("starting the match")
@@ -119,3 +127,6 @@ class Controller(IController):
         self.__logger.info("market open")
         self.__market_timer.start()
         self.__tick_timer.start()
+
+        if self.__virtual_clock:
+            await self.__virtual_clock.run()
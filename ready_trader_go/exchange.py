@@ -17,6 +17,8 @@
 #     <https://www.gnu.org/licenses/>.
 import socket
 
+from typing import Optional
+
 from .account import AccountFactory
 from .application import Application
 from .competitor import CompetitorManager
@@ -27,10 +29,10 @@ from .information import InformationPublisher
 from .limiter import FrequencyLimiterFactory
 from .market_events import MarketEventsReader
 from .match_events import MatchEvents, MatchEventsWriter
-from .order_book import OrderBook
+from .order_book import OrderBookFactory
 from .pubsub import PublisherFactory
 from .score_board import ScoreBoardWriter
-from .timer import Timer
+from .timer import Timer, VirtualClock
 from .types import Instrument
 from .unhedged_lots import UnhedgedLotsFactory
 
@@ -70,6 +72,34 @@ def __exchange_config_validator(config):
                                          "MessageFrequencyLimit", "PositionLimit"), (int, int, float, int, int))
     __validate_hostname(config, "Execution", "Host")
 
+    if "MatchEventsSegmentInterval" in config["Engine"] and (
+            type(config["Engine"]["MatchEventsSegmentInterval"]) is not float
+            or config["Engine"]["MatchEventsSegmentInterval"] <= 0.0):
+        raise Exception("Engine.MatchEventsSegmentInterval should be a positive number")
+    if "OrderBookType" in config["Engine"] and config["Engine"]["OrderBookType"] not in ("sorted", "ladder"):
+        raise Exception("Engine.OrderBookType should be either 'sorted' or 'ladder'")
+    if "ScoreBoardKeyframeInterval" in config["Engine"] and (
+            type(config["Engine"]["ScoreBoardKeyframeInterval"]) is not int
+            or config["Engine"]["ScoreBoardKeyframeInterval"] <= 0):
+        raise Exception("Engine.ScoreBoardKeyframeInterval should be a positive integer")
+    if "StartTime" in config["Engine"] and (type(config["Engine"]["StartTime"]) is not float
+                                            or config["Engine"]["StartTime"] < 0.0):
+        raise Exception("Engine.StartTime should be a number that is not negative")
+    if "TimerSeed" in config["Engine"] and type(config["Engine"]["TimerSeed"]) is not int:
+        raise Exception("Engine.TimerSeed should be an integer")
+    if "VirtualTime" in config["Engine"] and type(config["Engine"]["VirtualTime"]) is not bool:
+        raise Exception("Engine.VirtualTime should be either true or false")
+    if "VirtualTimeQuietPeriod" in config["Engine"] and (type(config["Engine"]["VirtualTimeQuietPeriod"]) is not float
+                                                         or config["Engine"]["VirtualTimeQuietPeriod"] <= 0.0):
+        raise Exception("Engine.VirtualTimeQuietPeriod should be a positive number")
+
+    if "WriterBufferSize" in config["Engine"] and (type(config["Engine"]["WriterBufferSize"]) is not int
+                                                   or config["Engine"]["WriterBufferSize"] <= 0):
+        raise Exception("Engine.WriterBufferSize should be a positive integer")
+    if "WriterFlushInterval" in config["Engine"] and (type(config["Engine"]["WriterFlushInterval"]) is not float
+                                                      or config["Engine"]["WriterFlushInterval"] <= 0.0):
+        raise Exception("Engine.WriterFlushInterval should be a positive number")
+
     if "Hud" in config:
         __validate_object(config, "Hud", ("Host", "Port"), (str, int))
         __validate_hostname(config, "Hud", "Host")
@@ -92,31 +122,48 @@ def setup(app: Application) -> Controller:
     instrument = app.config["Instrument"]
     limits = app.config["Limits"]
 
-    future_book = OrderBook(Instrument.FUTURE, 0.0, 0.0)
-    etf_book = OrderBook(Instrument.ETF, app.config["Fees"]["Maker"], app.config["Fees"]["Taker"])
+    order_book_factory = OrderBookFactory(engine.get("OrderBookType", "sorted"), instrument["TickSize"],
+                                          coalesce_trades=True)
+    future_book = order_book_factory.create(Instrument.FUTURE, 0.0, 0.0)
+    etf_book = order_book_factory.create(Instrument.ETF, app.config["Fees"]["Maker"], app.config["Fees"]["Taker"])
 
+    writer_buffer_size: int = engine.get("WriterBufferSize", 1 << 20)
+    writer_flush_interval: float = engine.get("WriterFlushInterval", 1.0)
     match_events = MatchEvents()
-    match_events_writer = MatchEventsWriter(match_events, engine["MatchEventsFile"], app.event_loop)
+    match_events_writer = MatchEventsWriter(match_events, engine["MatchEventsFile"], app.event_loop,
+                                            writer_buffer_size, writer_flush_interval,
+                                            engine.get("MatchEventsSegmentInterval"))
     market_events_reader = MarketEventsReader(engine["MarketDataFile"], app.event_loop, future_book, etf_book,
-                                              match_events)
-    score_board_writer = ScoreBoardWriter(engine["ScoreBoardFile"], app.event_loop)
-
-    tick_timer = Timer(engine["TickInterval"], engine["Speed"])
+                                              match_events, engine.get("StartTime", 0.0))
+    score_board_writer = ScoreBoardWriter(engine["ScoreBoardFile"], app.event_loop, writer_buffer_size,
+                                          writer_flush_interval, engine.get("ScoreBoardKeyframeInterval"))
+
+    # In virtual time the match runs as fast as the auto-traders allow and the speed is ignored
+    virtual_clock: Optional[VirtualClock] = None
+    speed: float = engine["Speed"]
+    if engine.get("VirtualTime", False):
+        virtual_clock = VirtualClock(engine.get("VirtualTimeQuietPeriod", 0.005))
+        speed = 1.0
+
+    # Each timer has its own random number generator so that a seed gives the same jitter on every run
+    timer_seed: Optional[int] = engine.get("TimerSeed")
+    tick_timer = Timer(engine["TickInterval"], speed, virtual_clock, timer_seed)
     account_factory = AccountFactory(instrument["EtfClamp"], instrument["TickSize"])
-    unhedged_lots_factory = UnhedgedLotsFactory()
+    unhedged_lots_factory = UnhedgedLotsFactory(tick_timer, engine["TickInterval"], speed)
     competitor_manager = CompetitorManager(app.config["Limits"], app.config["Traders"], account_factory, etf_book,
                                            future_book, match_events, score_board_writer, instrument["TickSize"],
                                            tick_timer, unhedged_lots_factory)
 
-    limiter_factory = FrequencyLimiterFactory(limits["MessageFrequencyInterval"] / engine["Speed"],
+    limiter_factory = FrequencyLimiterFactory(limits["MessageFrequencyInterval"] / speed,
                                               limits["MessageFrequencyLimit"])
-    exec_server = ExecutionServer(exec_["Host"], exec_["Port"], competitor_manager, limiter_factory)
+    exec_server = ExecutionServer(exec_["Host"], exec_["Port"], competitor_manager, limiter_factory, virtual_clock)
     info_publisher = InformationPublisher(app.event_loop, PublisherFactory(info["Type"], info["Name"]),
-                                          (future_book, etf_book), tick_timer)
+                                          (future_book, etf_book), tick_timer, virtual_clock)
 
-    market_timer = Timer(engine["MarketEventInterval"], engine["Speed"])
+    market_timer = Timer(engine["MarketEventInterval"], speed, virtual_clock,
+                         None if timer_seed is None else timer_seed + 1)
     controller = Controller(engine["MarketOpenDelay"], exec_server, info_publisher, market_events_reader,
-                            match_events_writer, score_board_writer, market_timer, tick_timer)
+                            match_events_writer, score_board_writer, market_timer, tick_timer, virtual_clock)
     competitor_manager.controller = controller
     exec_server.controller = controller
 
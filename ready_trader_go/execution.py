@@ -28,12 +28,21 @@ from .messages import (AMEND_MESSAGE, AMEND_MESSAGE_SIZE, CANCEL_MESSAGE, CANCEL
                        INSERT_MESSAGE_SIZE, LOGIN_MESSAGE, LOGIN_MESSAGE_SIZE, ORDER_FILLED_MESSAGE,
                        ORDER_FILLED_MESSAGE_SIZE, ORDER_STATUS_MESSAGE, ORDER_STATUS_MESSAGE_SIZE,
                        Connection, MessageType)
+from .timer import VirtualClock
 from .types import IController, IExecutionConnection
 
 
 class ExecutionConnection(Connection, IExecutionConnection):
+    """A connection to an auto-trader.
+
+    Messages sent to the auto-trader are collected in an output buffer and
+    written with a single write at the end of the event loop iteration, so
+    that all of the messages caused by one inbound message or batch of
+    market events are sent together.
+    """
+
     def __init__(self, competitor_manager: CompetitorManager, frequency_limiter: FrequencyLimiter,
-                 controller: IController):
+                 controller: IController, virtual_clock: Optional[VirtualClock] = None):
         """Initialise a new instance of the ExecutionChannel class."""
         Connection.__init__(self)
 
@@ -43,7 +52,14 @@ class ExecutionConnection(Connection, IExecutionConnection):
         self.closing: bool = False
         self.frequency_limiter: FrequencyLimiter = frequency_limiter
         self.logger: logging.Logger = logging.getLogger("EXECUTION")
-        self.login_timeout: asyncio.Handle = asyncio.get_running_loop().call_later(1.0, self.close)
+        self.event_loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self.login_timeout: asyncio.Handle = self.event_loop.call_later(1.0, self.close)
+        self.message_count: int = 0
+        self.virtual_clock: Optional[VirtualClock] = virtual_clock
+        self.write_count: int = 0
+
+        self.__flush_handle: Optional[asyncio.Handle] = None
+        self.__output = bytearray()
 
         self.__error_message = bytearray(ERROR_MESSAGE_SIZE)
         self.__hedge_filled_message = bytearray(HEDGE_FILLED_MESSAGE_SIZE)
@@ -61,6 +77,7 @@ class ExecutionConnection(Connection, IExecutionConnection):
 
     def close(self):
         """Close the connection associated with this ExecutionChannel instance."""
+        self.flush()
         Connection.close(self)
         self.login_timeout.cancel()
         self.closing = True
@@ -75,6 +92,13 @@ class ExecutionConnection(Connection, IExecutionConnection):
         if self.competitor is not None:
             self.competitor.on_connection_lost(self.controller.advance_time())
         self.competitor_manager.on_competitor_disconnect()
+        if self.virtual_clock:
+            self.virtual_clock.on_connection_lost()
+        self.logger.info("fd=%d message frequency: peak_value=%d limit=%d headroom=%d", self._file_number,
+                         self.frequency_limiter.peak_value, self.frequency_limiter.limit,
+                         self.frequency_limiter.headroom)
+        self.logger.info("fd=%d sent %d messages in %d writes", self._file_number, self.message_count,
+                         self.write_count)
         if not self.closing:
             self.logger.warning("fd=%d lost connection to auto-trader:", self._file_number, exc_info=exc)
 
@@ -82,14 +106,33 @@ class ExecutionConnection(Connection, IExecutionConnection):
         """Called when the connection is established."""
         Connection.connection_made(self, transport)
         self.competitor_manager.on_competitor_connect()
+        if self.virtual_clock:
+            self.virtual_clock.on_connection_made()
+
+    def flush(self) -> None:
+        """Write the messages in the output buffer to the auto-trader."""
+        if self.__flush_handle is not None:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+        if self.__output:
+            # The transport may keep a reference to unsent data, so start a new output buffer
+            output = self.__output
+            self.__output = bytearray()
+            if self._connection_transport is not None and not self._connection_transport.is_closing():
+                self._connection_transport.write(output)
+                self.write_count += 1
+                if self.virtual_clock:
+                    self.virtual_clock.note_activity()
 
     def on_message(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Called when a message is received from the auto-trader."""
         now: float = self.controller.advance_time()
+        if self.virtual_clock:
+            self.virtual_clock.note_activity()
 
         if self.frequency_limiter.check_event(now):
-            self.logger.info("fd=%d message frequency limit breached: now=%.6f value=%d limit=%d",
-                             self._file_number, now, self.frequency_limiter.value, self.frequency_limiter.limit)
+            self.logger.info("fd=%d message frequency limit breached: now=%.6f more than %d messages in %.3f seconds",
+                             self._file_number, now, self.frequency_limiter.limit, self.frequency_limiter.interval)
             if self.competitor is not None:
                 self.competitor.hard_breach(now, 0, b"message frequency limit breached")
             else:
@@ -137,30 +180,37 @@ class ExecutionConnection(Connection, IExecutionConnection):
     def send_error(self, client_order_id: int, error_message: bytes) -> None:
         """Send an error message to the auto-trader."""
         ERROR_MESSAGE.pack_into(self.__error_message, HEADER_SIZE, client_order_id, error_message)
-        self._connection_transport.write(self.__error_message)
+        self.__write(self.__error_message)
 
     def send_hedge_filled(self, client_order_id: int, average_price: int, volume: int) -> None:
         """Send a hedge filled message to the auto-trader."""
         HEDGE_FILLED_MESSAGE.pack_into(self.__hedge_filled_message, HEADER_SIZE, client_order_id, average_price,
                                        volume)
-        self._connection_transport.write(self.__hedge_filled_message)
+        self.__write(self.__hedge_filled_message)
 
     def send_order_filled(self, client_order_id: int, price: int, volume: int) -> None:
         """Send an order filled message to the auto-trader."""
         ORDER_FILLED_MESSAGE.pack_into(self.__order_filled_message, HEADER_SIZE, client_order_id, price, volume)
-        self._connection_transport.write(self.__order_filled_message)
+        self.__write(self.__order_filled_message)
 
     def send_order_status(self, client_order_id: int, fill_volume: int, remaining_volume: int, fees: int) -> None:
         """Send an order status message to the auto-trader."""
         ORDER_STATUS_MESSAGE.pack_into(self.__order_status_message, HEADER_SIZE, client_order_id, fill_volume,
                                        remaining_volume, fees)
-        self._connection_transport.write(self.__order_status_message)
+        self.__write(self.__order_status_message)
+
+    def __write(self, message: bytearray) -> None:
+        """Add a message to the output buffer and make sure it will be flushed."""
+        if self.__flush_handle is None:
+            self.__flush_handle = self.event_loop.call_soon(self.flush)
+        self.__output += message
+        self.message_count += 1
 
 
 class ExecutionServer:
     """A server for execution connections."""
     def __init__(self, host: str, port: int, competitor_manager: CompetitorManager,
-                 limiter_factory: FrequencyLimiterFactory):
+                 limiter_factory: FrequencyLimiterFactory, virtual_clock: Optional[VirtualClock] = None):
         """Initialise a new instance of the ExecutionServer class."""
         self.controller: Optional[IController] = None
         self.host: str = host
@@ -170,6 +220,7 @@ class ExecutionServer:
         self.__limiter_factory: FrequencyLimiterFactory = limiter_factory
         self.__logger = logging.getLogger("EXECUTION")
         self.__server: Optional[asyncio.AbstractServer] = None
+        self.__virtual_clock: Optional[VirtualClock] = virtual_clock
 
     def close(self):
         """Close the server without affecting existing connections."""
@@ -177,7 +228,8 @@ class ExecutionServer:
 
     def __on_new_connection(self) -> ExecutionConnection:
         """Callback for when a new connection is accepted."""
-        return ExecutionConnection(self.__competitor_manager, self.__limiter_factory.create(), self.controller)
+        return ExecutionConnection(self.__competitor_manager, self.__limiter_factory.create(), self.controller,
+                                   self.__virtual_clock)
 
     async def start(self) -> None:
         """Start the server."""
@@ -64,7 +64,9 @@ class HudConnection(Connection, IExecutionConnection):
     def connection_lost(self, exc: Optional[Exception]) -> None:
         """Called when the connection to the heads-up display is lost."""
         Connection.connection_lost(self, exc)
-        self.__match_events.event_occurred.remove(self.on_match_event)
+        for callback in (self.on_amend_event, self.on_cancel_event, self.on_hedge_event, self.on_insert_event,
+                         self.on_trade_event):
+            self.__match_events.unsubscribe(callback)
         self.__competitor_manager.competitor_logged_in.remove(self.on_competitor_logged_in)
         self.__competitor_manager.on_competitor_disconnect()
 
@@ -75,7 +77,11 @@ class HudConnection(Connection, IExecutionConnection):
         self.__competitor_manager.competitor_logged_in.append(self.on_competitor_logged_in)
         for competitor in self.__competitor_manager.get_competitors():
             self.on_competitor_logged_in(competitor.name)
-        self.__match_events.event_occurred.append(self.on_match_event)
+        self.__match_events.subscribe(self.on_amend_event, (MatchEventOperation.AMEND,))
+        self.__match_events.subscribe(self.on_cancel_event, (MatchEventOperation.CANCEL,))
+        self.__match_events.subscribe(self.on_hedge_event, (MatchEventOperation.HEDGE,))
+        self.__match_events.subscribe(self.on_insert_event, (MatchEventOperation.INSERT,))
+        self.__match_events.subscribe(self.on_trade_event, (MatchEventOperation.TRADE,))
 
     def on_message(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Callback when a message is received from the Heads-Up Display."""
@@ -111,32 +117,39 @@ class HudConnection(Connection, IExecutionConnection):
         """Called when the heads-up display logs in."""
         self.__competitor = self.__competitor_manager.login_competitor(name, secret, self)
 
-    def on_match_event(self, event: MatchEvent) -> None:
-        """Called when a match event occurs."""
-        if event.operation == MatchEventOperation.AMEND:
-            AMEND_EVENT_MESSAGE.pack_into(self.__amend_event_message, HEADER_SIZE, event.time,
-                                          self.__competitor_ids[event.competitor], event.order_id, event.volume)
-            self._connection_transport.write(self.__amend_event_message)
-        elif event.operation == MatchEventOperation.CANCEL:
-            CANCEL_EVENT_MESSAGE.pack_into(self.__cancel_event_message, HEADER_SIZE, event.time,
-                                           self.__competitor_ids[event.competitor], event.order_id)
-            self._connection_transport.write(self.__cancel_event_message)
-        elif event.operation == MatchEventOperation.INSERT:
-            INSERT_EVENT_MESSAGE.pack_into(self.__insert_event_message, HEADER_SIZE, event.time,
-                                           self.__competitor_ids[event.competitor], event.order_id,
-                                           event.instrument.value, event.side.value, event.volume, event.price,
-                                           event.lifespan.value)
-            self._connection_transport.write(self.__insert_event_message)
-        elif event.operation == MatchEventOperation.HEDGE:
-            HEDGE_EVENT_MESSAGE.pack_into(self.__hedge_event_message, HEADER_SIZE, event.time,
-                                          self.__competitor_ids[event.competitor], event.side, event.instrument,
-                                          event.volume, event.price)
-            self._connection_transport.write(self.__hedge_event_message)
-        elif event.operation == MatchEventOperation.TRADE:
-            TRADE_EVENT_MESSAGE.pack_into(self.__trade_event_message, HEADER_SIZE, event.time,
-                                          self.__competitor_ids[event.competitor], event.order_id,
-                                          event.side, event.instrument, event.volume, event.price, event.fee)
-            self._connection_transport.write(self.__trade_event_message)
+    def on_amend_event(self, event: MatchEvent) -> None:
+        """Called when an amend event occurs."""
+        AMEND_EVENT_MESSAGE.pack_into(self.__amend_event_message, HEADER_SIZE, event.time,
+                                      self.__competitor_ids[event.competitor], event.order_id, event.volume)
+        self._connection_transport.write(self.__amend_event_message)
+
+    def on_cancel_event(self, event: MatchEvent) -> None:
+        """Called when a cancel event occurs."""
+        CANCEL_EVENT_MESSAGE.pack_into(self.__cancel_event_message, HEADER_SIZE, event.time,
+                                       self.__competitor_ids[event.competitor], event.order_id)
+        self._connection_transport.write(self.__cancel_event_message)
+
+    def on_hedge_event(self, event: MatchEvent) -> None:
+        """Called when a hedge event occurs."""
+        HEDGE_EVENT_MESSAGE.pack_into(self.__hedge_event_message, HEADER_SIZE, event.time,
+                                      self.__competitor_ids[event.competitor], event.side, event.instrument,
+                                      event.volume, event.price)
+        self._connection_transport.write(self.__hedge_event_message)
+
+    def on_insert_event(self, event: MatchEvent) -> None:
+        """Called when an insert event occurs."""
+        INSERT_EVENT_MESSAGE.pack_into(self.__insert_event_message, HEADER_SIZE, event.time,
+                                       self.__competitor_ids[event.competitor], event.order_id,
+                                       event.instrument.value, event.side.value, event.volume, event.price,
+                                       event.lifespan.value)
+        self._connection_transport.write(self.__insert_event_message)
+
+    def on_trade_event(self, event: MatchEvent) -> None:
+        """Called when a trade event occurs."""
+        TRADE_EVENT_MESSAGE.pack_into(self.__trade_event_message, HEADER_SIZE, event.time,
+                                      self.__competitor_ids[event.competitor], event.order_id,
+                                      event.side, event.instrument, event.volume, event.price, event.fee)
+        self._connection_transport.write(self.__trade_event_message)
 
     # IExecutionConnection overrides
 
@@ -28,6 +28,8 @@ from typing import Any, Mapping, Tuple
 from PySide6 import QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
+from ready_trader_go.match_events import MATCH_EVENTS_INDEX_SUFFIX, is_match_events_journal, read_match_events_window
+
 from .event_source import EventSource, LiveEventSource, RecordedEventSource
 from .main_window.main_window import MainWindow
 
@@ -103,8 +105,15 @@ def replay(path: pathlib.Path):
     splash = __show_splash()
     splash.showMessage("Processing %s..." % str(path), Qt.AlignBottom, QtGui.QColor("#F0F0F0"))
     etf_clamp, tick_size = __read_exchange_config()
-    with path.open("r", newline="") as csv_file:
-        event_source = RecordedEventSource.from_csv(csv_file, etf_clamp, tick_size)
+    if path.suffix == MATCH_EVENTS_INDEX_SUFFIX:
+        event_source = RecordedEventSource.from_rows(map(tuple, read_match_events_window(str(path))), etf_clamp,
+                                                     tick_size)
+    elif is_match_events_journal(str(path)):
+        with path.open("rb") as journal:
+            event_source = RecordedEventSource.from_journal(journal, etf_clamp, tick_size)
+    else:
+        with path.open("r", newline="") as csv_file:
+            event_source = RecordedEventSource.from_csv(csv_file, etf_clamp, tick_size)
     window = __show_main_window(splash, event_source)
     return app.exec_()
 
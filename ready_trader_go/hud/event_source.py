@@ -19,7 +19,8 @@ import collections
 import csv
 import itertools
 
-from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+from typing import (BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, TextIO,
+                    Tuple)
 
 from PySide6 import QtCore,  QtNetwork
 
@@ -29,6 +30,7 @@ from ready_trader_go.messages import (AMEND_EVENT_MESSAGE, AMEND_EVENT_MESSAGE_S
                                       HEDGE_EVENT_MESSAGE, HEDGE_EVENT_MESSAGE_SIZE, INSERT_EVENT_MESSAGE,
                                       INSERT_EVENT_MESSAGE_SIZE, LOGIN_EVENT_MESSAGE, LOGIN_EVENT_MESSAGE_SIZE,
                                       TRADE_EVENT_MESSAGE, TRADE_EVENT_MESSAGE_SIZE, MessageType)
+from ready_trader_go.match_events import read_binary_match_events
 from ready_trader_go.order_book import TOP_LEVEL_COUNT, Order, OrderBook
 from ready_trader_go.types import Instrument, Lifespan, Side
 
@@ -98,6 +100,7 @@ class LiveEventSource(EventSource):
         self.port: int = port
 
         self.__accounts: Dict[int, CompetitorAccount] = dict()
+        self.__book_versions: List[int] = [-1 for _ in Instrument]
         self.__now: float = 0.0
         self.__order_books: List[OrderBook] = list(OrderBook(i, 0.0, 0.0) for i in Instrument)
         self.__orders: Dict[int, Dict[int, Order]] = {0: dict()}
@@ -221,10 +224,12 @@ class LiveEventSource(EventSource):
             midpoint_price: float = self.__order_books[i].midpoint_price()
             if midpoint_price is not None:
                 self.midpoint_price_changed.emit(i, self.__now, midpoint_price)
-                self.__order_books[i].top_levels(self.__ask_prices, self.__ask_volumes, self.__bid_prices,
-                                                 self.__bid_volumes)
-                self.order_book_changed.emit(i, self.__now, self.__ask_prices, self.__ask_volumes,
-                                             self.__bid_prices, self.__bid_volumes)
+                if self.__order_books[i].version != self.__book_versions[i]:
+                    self.__book_versions[i] = self.__order_books[i].version
+                    self.__order_books[i].top_levels(self.__ask_prices, self.__ask_volumes, self.__bid_prices,
+                                                     self.__bid_volumes)
+                    self.order_book_changed.emit(i, self.__now, self.__ask_prices, self.__ask_volumes,
+                                                 self.__bid_prices, self.__bid_volumes)
 
         future_price: int = self.__order_books[Instrument.FUTURE].last_traded_price()
         etf_price: int = self.__order_books[Instrument.ETF].last_traded_price()
@@ -308,11 +313,23 @@ class RecordedEventSource(EventSource):
     def from_csv(file_object: TextIO, etf_clamp: float, tick_size: float,
                  parent: Optional[QtCore.QObject] = None):
         """Create a new RecordedEventSource instance from a CSV file."""
-        source = RecordedEventSource(etf_clamp, tick_size, parent)
-        events = source.__events
-
         reader = csv.reader(file_object)
         next(reader)  # Skip header
+        return RecordedEventSource.from_rows(reader, etf_clamp, tick_size, parent)
+
+    @staticmethod
+    def from_journal(file_object: BinaryIO, etf_clamp: float, tick_size: float,
+                     parent: Optional[QtCore.QObject] = None):
+        """Create a new RecordedEventSource instance from a binary match events journal."""
+        return RecordedEventSource.from_rows(map(tuple, read_binary_match_events(file_object)), etf_clamp,
+                                             tick_size, parent)
+
+    @staticmethod
+    def from_rows(reader: Iterable[Sequence], etf_clamp: float, tick_size: float,
+                  parent: Optional[QtCore.QObject] = None):
+        """Create a new RecordedEventSource instance from rows of match event fields."""
+        source = RecordedEventSource(etf_clamp, tick_size, parent)
+        events = source.__events
 
         accounts: Dict[str, CompetitorAccount] = collections.defaultdict(source._account_factory.create)
         books: Tuple[OrderBook, ...] = tuple(OrderBook(i, 0.0, 0.0) for i in Instrument)
@@ -25,7 +25,7 @@ from .messages import (HEADER, HEADER_SIZE, ORDER_BOOK_HEADER, ORDER_BOOK_HEADER
                        TRADE_TICKS_MESSAGE, TRADE_TICKS_MESSAGE_SIZE, MessageType)
 from .order_book import TOP_LEVEL_COUNT, OrderBook
 from .pubsub import PublisherFactory
-from .timer import Timer
+from .timer import Timer, VirtualClock
 from .types import Instrument
 
 
@@ -33,8 +33,9 @@ class InformationPublisher(asyncio.DatagramProtocol):
     """A publisher of exchange information."""
 
     def __init__(self, loop: asyncio.AbstractEventLoop, publisher_factory: PublisherFactory,
-                 order_books: Iterable[OrderBook], timer: Timer):
+                 order_books: Iterable[OrderBook], timer: Timer, virtual_clock: Optional[VirtualClock] = None):
         """Initialize a new instance of the InformationChannel class."""
+        self.__book_versions: List[int] = [-1 for _ in Instrument]
         self.__event_loop: asyncio.AbstractEventLoop = loop
         self.__file_number: int = 0
         self.__logger: logging.Logger = logging.getLogger("INFORMATION")
@@ -43,6 +44,7 @@ class InformationPublisher(asyncio.DatagramProtocol):
         self.__send_ticks_handles: List[Optional[asyncio.Handle]] = [None for _ in Instrument]
         self.__trade_ticks_sequences: List[int] = [1 for _ in Instrument]
         self.__transport: Optional[asyncio.WriteTransport] = None
+        self.__virtual_clock: Optional[VirtualClock] = virtual_clock
 
         # Connect signals
         for book in self.__order_books:
@@ -55,10 +57,12 @@ class InformationPublisher(asyncio.DatagramProtocol):
         self.__bid_prices: List[int] = [0] * TOP_LEVEL_COUNT
         self.__bid_volumes: List[int] = [0] * TOP_LEVEL_COUNT
 
-        # Message buffers
-        self.__book_message = bytearray(ORDER_BOOK_MESSAGE_SIZE)
+        # Message buffers (one order book message per instrument so that an
+        # unchanged book can be sent again without being repacked)
+        self.__book_messages = [bytearray(ORDER_BOOK_MESSAGE_SIZE) for _ in Instrument]
         self.__ticks_message = bytearray(TRADE_TICKS_MESSAGE_SIZE)
-        HEADER.pack_into(self.__book_message, 0, ORDER_BOOK_MESSAGE_SIZE, MessageType.ORDER_BOOK_UPDATE)
+        for message in self.__book_messages:
+            HEADER.pack_into(message, 0, ORDER_BOOK_MESSAGE_SIZE, MessageType.ORDER_BOOK_UPDATE)
         HEADER.pack_into(self.__ticks_message, 0, TRADE_TICKS_MESSAGE_SIZE, MessageType.TRADE_TICKS)
 
     def connection_made(self, transport: asyncio.WriteTransport) -> None:
@@ -69,11 +73,17 @@ class InformationPublisher(asyncio.DatagramProtocol):
     def on_timer_tick(self, timer: Timer, now: float, tick_number: int) -> None:
         """Called each time the timer ticks."""
         for book in self.__order_books:
-            book.top_levels(self.__ask_prices, self.__ask_volumes, self.__bid_prices, self.__bid_volumes)
-            ORDER_BOOK_HEADER.pack_into(self.__book_message, HEADER_SIZE, book.instrument, tick_number)
-            ORDER_BOOK_MESSAGE.pack_into(self.__book_message, ORDER_BOOK_HEADER_SIZE, *self.__ask_prices,
-                                         *self.__ask_volumes, *self.__bid_prices, *self.__bid_volumes)
-            self.__transport.write(self.__book_message)
+            message = self.__book_messages[book.instrument]
+            if book.version != self.__book_versions[book.instrument]:
+                self.__book_versions[book.instrument] = book.version
+                book.top_levels(self.__ask_prices, self.__ask_volumes, self.__bid_prices, self.__bid_volumes)
+                ORDER_BOOK_MESSAGE.pack_into(message, ORDER_BOOK_HEADER_SIZE, *self.__ask_prices,
+                                             *self.__ask_volumes, *self.__bid_prices, *self.__bid_volumes)
+            ORDER_BOOK_HEADER.pack_into(message, HEADER_SIZE, book.instrument, tick_number)
+            self.__transport.write(message)
+
+        if self.__virtual_clock:
+            self.__virtual_clock.note_activity()
 
     def on_trade(self, book: OrderBook) -> None:
         """Called when a trade occurs in one of the order books."""
@@ -91,6 +101,8 @@ class InformationPublisher(asyncio.DatagramProtocol):
             TRADE_TICKS_MESSAGE.pack_into(self.__ticks_message, TRADE_TICKS_HEADER_SIZE, *self.__ask_prices,
                                           *self.__ask_volumes, *self.__bid_prices, *self.__bid_volumes)
             self.__transport.write(self.__ticks_message)
+            if self.__virtual_clock:
+                self.__virtual_clock.note_activity()
 
     async def start(self) -> None:
         """Start this publisher."""
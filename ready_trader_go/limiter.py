@@ -22,34 +22,53 @@ from typing import Deque
 
 
 class FrequencyLimiter(object):
-    """Limit the frequency of events in a specified time interval."""
+    """Limit the frequency of events in a specified time interval.
+
+    Only the times of the latest limit+1 events are needed to tell whether
+    the limit is breached, so they are kept in a fixed size ring. As a
+    result, the number of events in the window (the value) and the peak
+    value saturate at limit+1, which means "more than limit" rather than an
+    exact count.
+    """
 
     def __init__(self, interval: float, limit: int):
         """Initialise a new instance of the FrequencyLimiter class."""
-        self.events: Deque[float] = collections.deque()
+        self.events: Deque[float] = collections.deque(maxlen=limit + 1)
         self.interval: float = interval
         self.limit: int = limit
+        self.peak_value: int = 0  # Saturates at limit+1
         self.value: int = 0
 
+    @property
+    def headroom(self) -> int:
+        """Return the smallest number of events that were left before the limit was reached.
+
+        This is -1 if the limit was breached, however many events there were.
+        """
+        return self.limit - self.peak_value
+
     def check_event(self, now: float) -> bool:
         """Return True if the new event breaches the limit, False otherwise.
 
         This method should be called with a monotonically increasing sequence
         of times.
         """
-        self.value += 1
-        self.events.append(now)
+        events = self.events
+        events.append(now)
 
         epsilon: float = sys.float_info.epsilon
-        first: float = self.events[0]
+        first: float = events[0]
         window_start: float = now - self.interval
 
         while (first - window_start) <= ((first if first > window_start else window_start) * epsilon):
-            self.events.popleft()
-            self.value -= 1
-            first = self.events[0]
+            events.popleft()
+            first = events[0]
+
+        value = self.value = len(events)
+        if value > self.peak_value:
+            self.peak_value = value
 
-        return self.value > self.limit
+        return value > self.limit
 
 
 class FrequencyLimiterFactory:
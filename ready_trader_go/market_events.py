@@ -16,29 +16,57 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 import asyncio
+import bz2
 import csv
-import enum
+import gzip
+import io
+import json
 import logging
+import lzma
+import mmap
+import os
 import queue
+import struct
 import threading
+import warnings
 
-from typing import Callable, Dict, List, Optional, TextIO
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 from .match_events import MatchEvents
-from .order_book import IOrderListener, Order, OrderBook
-from .types import Instrument, Lifespan, Side
+from .order_book import IOrderListener, Order, OrderBook, OrderPool
+from .types import (INSTRUMENTS_BY_VALUE, LIFESPANS_BY_VALUE, SIDES_BY_VALUE, Instrument, Lifespan,
+                    MarketEventOperation, Side)
 
-MARKET_EVENT_QUEUE_SIZE = 1024
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MARKET_EVENT_CHUNK_SIZE = 2048  # Number of events passed from the reader thread at a time
+MARKET_EVENT_QUEUE_SIZE = 8  # Number of chunks
+MARKET_DATA_READ_BUFFER_SIZE = 1 << 20
 INPUT_SCALING = 100
 
+# CSV market data files with these extensions are (de)compressed as they are read or written
+COMPRESSED_MARKET_DATA_OPENERS: Dict[str, Callable[..., Any]] = {".bz2": bz2.open, ".gz": gzip.open,
+                                                                 ".xz": lzma.open}
+
+# Binary market data files hold a header followed by fixed-width records
+BINARY_MARKET_DATA_SUFFIX = ".bin"
+MARKET_DATA_MAGIC = b"RTGMD002"
+MARKET_DATA_HEADER = struct.Struct("<8sI")  # Magic, number of records
+MARKET_DATA_RECORD = struct.Struct("<dBBqBiiB")  # Time, instrument, operation, order id, side, volume, price, lifespan
+NO_VALUE = 255  # Side or lifespan of an event that has none
+
+# Translation table that turns everything but numbers into spaces
+__NUMBERS_ONLY = bytes(c if chr(c) in "+-.0123456789" else ord(" ") for c in range(256))
+__LARGEST_EXACT_ORDER_ID = 1 << 53  # Larger order ids cannot be parsed exactly as floating point numbers
 
-class MarketEventOperation(enum.IntEnum):
-    AMEND = 0
-    CANCEL = 1
-    INSERT = 2
-    Amend = AMEND
-    Cancel = CANCEL
-    Insert = INSERT
+# Market data index files hold checkpoints of the order books so that a
+# match can start part of the way through a market data file
+CHECKPOINT_INTERVAL = 60.0  # Seconds of market time between checkpoints
+MARKET_DATA_INDEX_SUFFIX = ".idx"
+MARKET_DATA_INDEX_VERSION = 1
 
 
 class MarketEvent(object):
@@ -58,12 +86,360 @@ class MarketEvent(object):
         self.lifespan: Optional[Lifespan] = lifespan
 
 
+def binary_market_data_filename(filename: str) -> str:
+    """Return the name of the binary market data file for a (possibly compressed) CSV market data file."""
+    return __market_data_stem(filename) + BINARY_MARKET_DATA_SUFFIX
+
+
+class MarketDataArrays(object):
+    """Market events held in columns of NumPy arrays, one element per event.
+
+    The columns hold the same values as the fields of a binary market data
+    record, so sides and lifespans are NO_VALUE for events that have none.
+    """
+    __slots__ = ("time", "instrument", "operation", "order_id", "side", "volume", "price", "lifespan")
+
+    def __init__(self, time: "numpy.ndarray", instrument: "numpy.ndarray", operation: "numpy.ndarray",
+                 order_id: "numpy.ndarray", side: "numpy.ndarray", volume: "numpy.ndarray", price: "numpy.ndarray",
+                 lifespan: "numpy.ndarray"):
+        """Initialise a new instance of the MarketDataArrays class."""
+        self.time: numpy.ndarray = time
+        self.instrument: numpy.ndarray = instrument
+        self.operation: numpy.ndarray = operation
+        self.order_id: numpy.ndarray = order_id
+        self.side: numpy.ndarray = side
+        self.volume: numpy.ndarray = volume
+        self.price: numpy.ndarray = price
+        self.lifespan: numpy.ndarray = lifespan
+
+    def __len__(self) -> int:
+        """Return the number of market events."""
+        return len(self.time)
+
+
+def array_market_event_chunks(arrays: MarketDataArrays, first_event: int = 0) -> Iterator[List[MarketEvent]]:
+    """Yield chunks of the market events in market data arrays, starting from the given event."""
+    instruments, operations, sides, lifespans = __event_field_values()
+
+    for start in range(first_event, len(arrays), MARKET_EVENT_CHUNK_SIZE):
+        end = start + MARKET_EVENT_CHUNK_SIZE
+        columns = (arrays.time[start:end].tolist(), arrays.instrument[start:end].tolist(),
+                   arrays.operation[start:end].tolist(), arrays.order_id[start:end].tolist(),
+                   arrays.side[start:end].tolist(), arrays.volume[start:end].tolist(),
+                   arrays.price[start:end].tolist(), arrays.lifespan[start:end].tolist())
+        yield [MarketEvent(t, instruments[i], operations[o], order_id, sides[s], volume, price, lifespans[l])
+               for t, i, o, order_id, s, volume, price, l in zip(*columns)]
+
+
+def binary_market_event_chunks(data: Any, first_event: int = 0) -> Iterator[List[MarketEvent]]:
+    """Yield chunks of the market events in binary market data, starting from the given event."""
+    instruments, operations, sides, lifespans = __event_field_values()
+
+    _, count = MARKET_DATA_HEADER.unpack_from(data)
+    with memoryview(data) as view:
+        for start in range(first_event, count, MARKET_EVENT_CHUNK_SIZE):
+            end = min(start + MARKET_EVENT_CHUNK_SIZE, count)
+            with view[MARKET_DATA_HEADER.size + start * MARKET_DATA_RECORD.size:
+                      MARKET_DATA_HEADER.size + end * MARKET_DATA_RECORD.size] as records:
+                chunk = [MarketEvent(t, instruments[i], operations[o], order_id, sides[s], volume, price, lifespans[l])
+                         for t, i, o, order_id, s, volume, price, l in MARKET_DATA_RECORD.iter_unpack(records)]
+            yield chunk
+
+
+def build_market_data_index(filename: str, binary: bool, interval: float) -> Dict[str, Any]:
+    """Replay a market data file and return an index of the order books every interval seconds.
+
+    Each checkpoint holds the state of the order books after every market
+    event before its time, the number of those events and the offset in the
+    file of the next one.
+    """
+    future_book = OrderBook(Instrument.FUTURE, 0.0, 0.0)
+    etf_book = OrderBook(Instrument.ETF, 0.0, 0.0)
+    reader = MarketEventsReader(filename, None, future_book, etf_book, MatchEvents())
+    starts: List[int] = list()
+
+    def numbered_chunks(chunks: Iterable[List[MarketEvent]]) -> Iterator[Optional[List[MarketEvent]]]:
+        number = 0
+        for chunk in chunks:
+            starts.append(number)
+            number += len(chunk)
+            yield chunk
+        yield None
+
+    checkpoints: List[Dict[str, Any]] = list()
+    if binary:
+        with open(filename, "rb") as market_data, mmap.mmap(market_data.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            reader.next_chunk = numbered_chunks(binary_market_event_chunks(data)).__next__
+            checkpoints = __replay_checkpoints(reader, starts, interval)
+        for checkpoint in checkpoints:
+            checkpoint["Offset"] = MARKET_DATA_HEADER.size + checkpoint["Event"] * MARKET_DATA_RECORD.size
+    else:
+        with open_market_data(filename) as market_data:
+            text = io.TextIOWrapper(market_data, newline="")
+            reader.next_chunk = numbered_chunks(csv_market_event_chunks(text)).__next__
+            checkpoints = __replay_checkpoints(reader, starts, interval)
+            text.detach()
+
+            # Each event is on a line of its own after the header row
+            market_data.seek(0)
+            offset = len(market_data.readline())
+            row = 0
+            for checkpoint in checkpoints:
+                while row < checkpoint["Event"]:
+                    offset += len(market_data.readline())
+                    row += 1
+                checkpoint["Offset"] = offset
+
+    stat = os.stat(filename)
+    return {"Version": MARKET_DATA_INDEX_VERSION, "Source": os.path.basename(filename), "Size": stat.st_size,
+            "ModifiedTime": stat.st_mtime, "Interval": interval, "Checkpoints": checkpoints}
+
+
+def __replay_checkpoints(reader: "MarketEventsReader", starts: List[int], interval: float) -> List[Dict[str, Any]]:
+    """Process every market event and return a checkpoint for every interval."""
+    checkpoints: List[Dict[str, Any]] = list()
+    now: float = interval
+    while True:
+        reader.process_market_events(now)
+        if reader.chunk is None:
+            return checkpoints
+        checkpoints.append({"Time": now, "Event": starts[-1] + reader.chunk_index,
+                            "Future": reader.future_book.checkpoint(), "Etf": reader.etf_book.checkpoint()})
+        now += interval
+
+
+def __event_field_values() -> Tuple[Dict[int, Instrument], Dict[int, MarketEventOperation],
+                                    Dict[int, Optional[Side]], Dict[int, Optional[Lifespan]]]:
+    """Return maps from the values in binary market data records to the values of market event fields."""
+    sides: Dict[int, Optional[Side]] = {**SIDES_BY_VALUE, NO_VALUE: None}
+    lifespans: Dict[int, Optional[Lifespan]] = {**LIFESPANS_BY_VALUE, NO_VALUE: None}
+    return dict(INSTRUMENTS_BY_VALUE), {o.value: o for o in MarketEventOperation}, sides, lifespans
+
+
+def convert_market_data(csv_filename: str, binary_filename: str) -> int:
+    """Convert a (possibly compressed) CSV market data file to a binary one and return the number of events."""
+    with io.TextIOWrapper(open_market_data(csv_filename), newline="") as market_data:
+        return write_binary_market_data(read_csv_market_events(market_data), binary_filename)
+
+
+def csv_market_event_chunks(market_data: TextIO, header: bool = True) -> Iterator[List[MarketEvent]]:
+    """Yield chunks of the market events in a CSV market data file."""
+    chunk: List[MarketEvent] = list()
+    for evt in read_csv_market_events(market_data, header):
+        chunk.append(evt)
+        if len(chunk) == MARKET_EVENT_CHUNK_SIZE:
+            yield chunk
+            chunk = list()
+    if chunk:
+        yield chunk
+
+
+def __decode_names(raw: Any, starts: Any, ends: Any, names: Dict[str, int], empty: Optional[int],
+                   what: str) -> Any:
+    """Return the values of the enum names in the given fields of a market data file (requires NumPy).
+
+    The fields of each length are compared byte by byte with the names of
+    that length and ValueError is raised if a field does not exactly match
+    one of them. An empty field is given the empty value, if there is one.
+    """
+    lengths = ends - starts
+    values = numpy.empty(starts.size, dtype=numpy.uint8)
+    for length in numpy.flatnonzero(numpy.bincount(lengths)) if lengths.size else ():
+        rows = numpy.flatnonzero(lengths == length)
+        if length == 0 and empty is not None:
+            values[rows] = empty
+            continue
+
+        row_starts = starts[rows]
+        columns = [raw[row_starts + i] for i in range(length)]
+        matched = numpy.zeros(rows.size, dtype=bool)
+        for name, value in names.items():
+            if len(name) == length:
+                chars = name.encode()
+                match = columns[0] == chars[0]
+                for column, char in zip(columns[1:], chars[1:]):
+                    match &= column == char
+                values[rows[match]] = value
+                matched |= match
+        if not numpy.all(matched):
+            raise ValueError("market data file contains an unknown %s" % what)
+    return values
+
+
+def market_data_index_filename(filename: str) -> str:
+    """Return the name of the index file for a (possibly compressed) CSV market data file."""
+    return __market_data_stem(filename) + MARKET_DATA_INDEX_SUFFIX
+
+
+def __market_data_stem(filename: str) -> str:
+    """Return a market data filename without its extension or its compression extension."""
+    stem, extension = os.path.splitext(filename)
+    if extension.lower() in COMPRESSED_MARKET_DATA_OPENERS:
+        stem = os.path.splitext(stem)[0]
+    return stem
+
+
+def load_market_data_arrays(filename: str) -> MarketDataArrays:
+    """Load a CSV (possibly compressed) or binary market data file into market data arrays (requires NumPy)."""
+    with open_market_data(filename) as market_data:
+        header = market_data.read(MARKET_DATA_HEADER.size)
+        if len(header) == MARKET_DATA_HEADER.size and MARKET_DATA_HEADER.unpack(header)[0] == MARKET_DATA_MAGIC:
+            records = numpy.frombuffer(market_data.read(), dtype=numpy.dtype([
+                ("time", "<f8"), ("instrument", "u1"), ("operation", "u1"), ("order_id", "<i8"), ("side", "u1"),
+                ("volume", "<i4"), ("price", "<i4"), ("lifespan", "u1")]), count=MARKET_DATA_HEADER.unpack(header)[1])
+            return MarketDataArrays(*(numpy.ascontiguousarray(records[name]) for name in records.dtype.names))
+        market_data.seek(0)
+        return read_csv_market_data_arrays(market_data)
+
+
+def open_market_data(filename: str) -> BinaryIO:
+    """Open a market data file for reading in binary mode with a large buffer.
+
+    Files ending in ".bz2", ".gz" or ".xz" are decompressed as they are read.
+    """
+    opener = COMPRESSED_MARKET_DATA_OPENERS.get(os.path.splitext(filename)[1].lower())
+    if opener is None:
+        return open(filename, "rb", buffering=MARKET_DATA_READ_BUFFER_SIZE)
+    return io.BufferedReader(opener(filename), MARKET_DATA_READ_BUFFER_SIZE)
+
+
+def read_csv_market_data_arrays(market_data: BinaryIO) -> MarketDataArrays:
+    """Read a CSV market data file into market data arrays in one go (requires NumPy).
+
+    Rather than parsing the file row by row, the file is scanned for the
+    commas and line breaks that delimit fields, the operation, side and
+    lifespan fields are compared in full with the names of their enums and
+    the numeric fields are parsed all at once. ValueError is raised if the file is not
+    laid out as expected or holds values that could not be read exactly (such
+    as order ids of 2**53 or more), in which case it can still be read with
+    read_csv_market_events.
+    """
+    data = market_data.read()
+    header_end = data.find(b"\n")
+    data = data[header_end + 1:] if header_end >= 0 else b""  # Skip header row
+    if data and not data.endswith(b"\n"):
+        data += b"\n"
+
+    raw = numpy.frombuffer(data, dtype=numpy.uint8)
+    line_ends = numpy.flatnonzero(raw == ord("\n"))
+    commas = numpy.flatnonzero(raw == ord(","))
+    count = line_ends.size
+    if commas.size != 7 * count:
+        raise ValueError("market data rows should have eight fields")
+    commas = commas.reshape(count, 7)
+    line_starts = numpy.concatenate(([0], line_ends[:-1] + 1))
+    if numpy.any(commas[:, 0] < line_starts) or numpy.any(commas[:, 6] > line_ends):
+        raise ValueError("market data rows should have eight fields")
+
+    # time, instrument, operation, order_id, side, volume, price, lifespan
+    line_content_ends = line_ends - (raw[line_ends - 1] == ord("\r"))
+    operation = __decode_names(raw, commas[:, 1] + 1, commas[:, 2], MarketEventOperation.__members__, None,
+                               "operation")
+    side = __decode_names(raw, commas[:, 3] + 1, commas[:, 4], Side.__members__, NO_VALUE, "side")
+    lifespan = __decode_names(raw, commas[:, 6] + 1, line_content_ends, Lifespan.__members__, NO_VALUE, "lifespan")
+
+    # Blank out everything but the numbers, then parse the numbers that are
+    # present in the time, instrument, order_id, volume and price fields
+    present = numpy.empty((count, 5), dtype=bool)
+    present[:, 0] = commas[:, 0] > line_starts
+    present[:, 1] = commas[:, 1] > commas[:, 0] + 1
+    present[:, 2] = commas[:, 3] > commas[:, 2] + 1
+    present[:, 3] = commas[:, 5] > commas[:, 4] + 1
+    present[:, 4] = commas[:, 6] > commas[:, 5] + 1
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        values = numpy.fromstring(data.translate(__NUMBERS_ONLY), sep=" ")
+    if values.size != numpy.count_nonzero(present) or not numpy.all(present[:, :3]):
+        raise ValueError("market data file contains a missing or invalid number")
+    fields = numpy.zeros((count, 5))
+    fields[present] = values
+    if numpy.any((fields[:, 1] != Instrument.FUTURE) & (fields[:, 1] != Instrument.ETF)):
+        raise ValueError("market data file contains an unknown instrument")
+    if numpy.any(fields[:, 2] >= __LARGEST_EXACT_ORDER_ID) or numpy.any(fields[:, 2] != numpy.floor(fields[:, 2])):
+        raise ValueError("market data file contains an order id that cannot be read exactly")
+
+    return MarketDataArrays(fields[:, 0].copy(), fields[:, 1].astype(numpy.uint8), operation,
+                            fields[:, 2].astype(numpy.int64), side, fields[:, 3].astype(numpy.int64),
+                            (fields[:, 4] * INPUT_SCALING).astype(numpy.int64), lifespan)
+
+
+def read_csv_market_events(market_data: TextIO, header: bool = True) -> Iterator[MarketEvent]:
+    """Yield the market events in a CSV market data file (which may start after the header row)."""
+    csv_reader = csv.reader(market_data)
+    if header:
+        next(csv_reader)  # Skip header row
+    for row in csv_reader:
+        # time, instrument, operation, order_id, side, volume, price, lifespan
+        yield MarketEvent(float(row[0]), Instrument(int(row[1])), MarketEventOperation[row[2]], int(row[3]),
+                          Side[row[4]] if row[4] else None, int(float(row[5])) if row[5] else 0,
+                          int(float(row[6]) * INPUT_SCALING) if row[6] else 0, Lifespan[row[7]] if row[7] else None)
+
+
+def write_binary_market_data(events: Iterable[MarketEvent], filename: str) -> int:
+    """Write market events to a binary market data file and return the number of events.
+
+    Raises ValueError if an event has a field that does not fit in a binary
+    record (such as an order id of 2**63 or more), in which case no file is
+    written.
+    """
+    count: int = 0
+    temporary_filename: str = filename + ".tmp"
+    try:
+        with open(temporary_filename, "wb", buffering=MARKET_DATA_READ_BUFFER_SIZE) as output:
+            output.write(MARKET_DATA_HEADER.pack(MARKET_DATA_MAGIC, 0))
+            for evt in events:
+                try:
+                    record = MARKET_DATA_RECORD.pack(evt.time, evt.instrument, evt.operation, evt.order_id,
+                                                     NO_VALUE if evt.side is None else evt.side, evt.volume,
+                                                     evt.price, NO_VALUE if evt.lifespan is None else evt.lifespan)
+                except struct.error as e:
+                    raise ValueError("market event %d (order id %d) cannot be written to a binary market data file:"
+                                     " %s" % (count + 1, evt.order_id, e)) from e
+                output.write(record)
+                count += 1
+            output.seek(0)
+            output.write(MARKET_DATA_HEADER.pack(MARKET_DATA_MAGIC, count))
+    except ValueError:
+        os.remove(temporary_filename)
+        raise
+    os.replace(temporary_filename, filename)
+    return count
+
+
+def write_csv_market_data(events: Iterable[MarketEvent], filename: str) -> int:
+    """Write market events to a CSV market data file and return the number of events.
+
+    Files ending in ".bz2", ".gz" or ".xz" are compressed as they are written.
+    """
+    count: int = 0
+    sides = {Side.SELL: "A", Side.BUY: "B", None: ""}
+    lifespans = {Lifespan.FILL_AND_KILL: "F", Lifespan.GOOD_FOR_DAY: "G", None: ""}
+    opener = COMPRESSED_MARKET_DATA_OPENERS.get(os.path.splitext(filename)[1].lower(), open)
+    with opener(filename, "wt", newline="") as output:
+        output.write("Time,Instrument,Operation,OrderId,Side,Volume,Price,Lifespan\n")
+        for evt in events:
+            if evt.operation == MarketEventOperation.INSERT:
+                output.write("%.6f,%d,Insert,%d,%s,%d,%.2f,%s\n" % (evt.time, evt.instrument, evt.order_id,
+                                                                    sides[evt.side], evt.volume,
+                                                                    evt.price / INPUT_SCALING,
+                                                                    lifespans[evt.lifespan]))
+            elif evt.operation == MarketEventOperation.CANCEL:
+                output.write("%.6f,%d,Cancel,%d,,,,\n" % (evt.time, evt.instrument, evt.order_id))
+            else:
+                output.write("%.6f,%d,Amend,%d,,%d,,\n" % (evt.time, evt.instrument, evt.order_id, evt.volume))
+            count += 1
+    return count
+
+
 class MarketEventsReader(IOrderListener):
     """A processor of market events read from a file."""
 
     def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, future_book: OrderBook, etf_book: OrderBook,
-                 match_events: MatchEvents):
+                 match_events: MatchEvents, start_time: float = 0.0):
         """Initialise a new instance of the MarketEvents class.
+
+        If start_time is given, the match starts that many seconds into the
+        market data file.
         """
         self.etf_book: OrderBook = etf_book
         self.etf_orders: Dict[int, Order] = dict()
@@ -73,12 +449,19 @@ class MarketEventsReader(IOrderListener):
         self.future_orders: Dict[int, Order] = dict()
         self.logger: logging.Logger = logging.getLogger("MARKET_EVENTS")
         self.match_events: MatchEvents = match_events
+        self.order_pool: OrderPool = OrderPool()
         self.queue: queue.Queue = queue.Queue(MARKET_EVENT_QUEUE_SIZE)
         self.reader_task: Optional[threading.Thread] = None
+        self.start_time: float = start_time
 
-        # Prime the event pump with a no-op event
-        self.next_event: Optional[MarketEvent] = MarketEvent(0.0, Instrument.FUTURE, MarketEventOperation.CANCEL, 0,
-                                                             Side.BUY, 0, 0, Lifespan.FILL_AND_KILL)
+        # Chunks of events are normally passed on by the reader thread
+        self.next_chunk: Callable[[], Optional[List[MarketEvent]]] = self.queue.get
+
+        # Prime the event pump with a chunk holding a no-op event (the chunk
+        # is None once the reader thread has passed on every event)
+        self.chunk: Optional[List[MarketEvent]] = [MarketEvent(0.0, Instrument.FUTURE, MarketEventOperation.CANCEL, 0,
+                                                               Side.BUY, 0, 0, Lifespan.FILL_AND_KILL)]
+        self.chunk_index: int = 0
 
         # Allow other objects to get a callback when the reader task is complete
         self.task_complete: List[Callable] = list()
@@ -89,6 +472,7 @@ class MarketEventsReader(IOrderListener):
         """Called when the order is amended."""
         self.match_events.amend(now, "", order.client_order_id, -volume_removed)
         if order.remaining_volume == 0:
+            self.order_pool.release(order)
             if order.instrument == Instrument.FUTURE:
                 del self.future_orders[order.client_order_id]
             elif order.instrument == Instrument.ETF:
@@ -97,11 +481,17 @@ class MarketEventsReader(IOrderListener):
     def on_order_cancelled(self, now: float, order: Order, volume_removed: int) -> None:
         """Called when the order is cancelled."""
         self.match_events.cancel(now, "", order.client_order_id, -volume_removed)
+        self.order_pool.release(order)
         if order.instrument == Instrument.FUTURE and order.client_order_id in self.future_orders:
             del self.future_orders[order.client_order_id]
         elif order.instrument == Instrument.ETF and order.client_order_id in self.etf_orders:
             del self.etf_orders[order.client_order_id]
 
+    def on_order_inserted(self, now: float, order: Order) -> None:
+        """Called when an order is about to be inserted into the order book."""
+        self.match_events.insert(now, "", order.client_order_id, order.instrument, order.side, abs(order.volume),
+                                 order.price, order.lifespan)
+
     def on_order_placed(self, now: float, order: Order) -> None:
         """Called when a good-for-day order is placed in the order book."""
         if order.instrument == Instrument.FUTURE:
@@ -112,6 +502,7 @@ class MarketEventsReader(IOrderListener):
     def on_order_filled(self, now: float, order: Order, price: int, volume: int, fee: int) -> None:
         """Called when the order is partially or completely filled."""
         if order.remaining_volume == 0:
+            self.order_pool.release(order)
             if order.instrument == Instrument.FUTURE and order.client_order_id in self.future_orders:
                 del self.future_orders[order.client_order_id]
             elif order.instrument == Instrument.ETF and order.client_order_id in self.etf_orders:
@@ -122,61 +513,209 @@ class MarketEventsReader(IOrderListener):
         self.logger.info("reader thread complete after processing %d market events", num_events)
 
     def process_market_events(self, elapsed_time: float) -> None:
-        """Process market events from the queue."""
-        evt: MarketEvent = self.next_event
+        """Process market events from the queue.
+
+        Consecutive events for the same instrument are collected into a batch
+        and applied to the order book in one go.
+        """
+        chunk: Optional[List[MarketEvent]] = self.chunk
+        index: int = self.chunk_index
+        evt: Optional[MarketEvent] = chunk[index] if chunk else None
+        batch: List[Tuple[float, MarketEventOperation, Order, int]] = list()
+        book: Optional[OrderBook] = None
+        inserted: Dict[int, Order] = dict()
 
         while evt and evt.time < elapsed_time:
             if evt.instrument == Instrument.FUTURE:
                 orders = self.future_orders
-                book = self.future_book
+                evt_book = self.future_book
             else:
                 orders = self.etf_orders
-                book = self.etf_book
+                evt_book = self.etf_book
+
+            if evt_book is not book:
+                if batch:
+                    book.apply_batch(batch)
+                    batch.clear()
+                    inserted.clear()
+                book = evt_book
 
             if evt.operation == MarketEventOperation.INSERT:
-                order = Order(evt.order_id, evt.instrument, evt.lifespan, evt.side, evt.price, evt.volume, self)
-                self.match_events.insert(evt.time, "", order.client_order_id, order.instrument, order.side,
-                                         abs(order.volume), order.price, order.lifespan)
-                book.insert(evt.time, order)
-            elif evt.order_id in orders:
-                order = orders[evt.order_id]
-                if evt.operation == MarketEventOperation.CANCEL:
-                    book.cancel(evt.time, order)
-                elif evt.volume < 0:
-                    # evt.operation must be MarketEventOperation.AMEND
-                    book.amend(evt.time, order, order.volume + evt.volume)
-
-            evt = self.queue.get()
-
-        self.next_event = evt
+                order = self.order_pool.acquire(evt.order_id, evt.instrument, evt.lifespan, evt.side, evt.price,
+                                                evt.volume, self)
+                inserted[evt.order_id] = order
+                batch.append((evt.time, evt.operation, order, 0))
+            else:
+                # The order may have been inserted earlier in this batch
+                order = orders.get(evt.order_id) or inserted.get(evt.order_id)
+                if order is not None and (evt.operation == MarketEventOperation.CANCEL or evt.volume < 0):
+                    batch.append((evt.time, evt.operation, order, evt.volume))
+
+            index += 1
+            if index == len(chunk):
+                chunk = self.next_chunk()
+                index = 0
+            evt = chunk[index] if chunk else None
+
+        if batch:
+            book.apply_batch(batch)
+
+        # Orders finished above may still be referenced by the batch
+        self.order_pool.recycle()
+
+        self.chunk = chunk
+        self.chunk_index = index
         if evt is None:
             for c in self.task_complete:
                 c(self)
 
-    def reader(self, market_data: TextIO) -> None:
-        """Read the market data file and place order events in the queue."""
-        fifo = self.queue
+    def array_reader(self, market_data: BinaryIO, first_event: int = 0, offset: int = 0) -> None:
+        """Load a CSV market data file into arrays and place chunks of order events in the queue.
+
+        If the file cannot be loaded into arrays, it is read row by row from
+        the given offset instead.
+        """
+        try:
+            with market_data:
+                arrays = read_csv_market_data_arrays(market_data)
+        except ValueError as e:
+            self.logger.warning("reading market data file row by row: %s", e)
+            market_data = open_market_data(self.filename)
+            market_data.seek(offset)
+            self.reader(io.TextIOWrapper(market_data, newline=""), offset == 0)
+            return
+
+        count = self.__queue_chunks(array_market_event_chunks(arrays, first_event))
+        self.event_loop.call_soon_threadsafe(self.on_reader_done, count)
 
+    def binary_reader(self, market_data: BinaryIO, first_event: int = 0) -> None:
+        """Read a binary market data file and place chunks of order events in the queue."""
+        with market_data, mmap.mmap(market_data.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            count = self.__queue_chunks(binary_market_event_chunks(data, first_event))
+        self.event_loop.call_soon_threadsafe(self.on_reader_done, count)
+
+    def reader(self, market_data: TextIO, header: bool = True) -> None:
+        """Read the market data file and place chunks of order events in the queue."""
         with market_data:
-            csv_reader = csv.reader(market_data)
-            next(csv_reader)  # Skip header row
-            for row in csv_reader:
-                # time, instrument, operation, order_id, side, volume, price, lifespan
-                fifo.put(MarketEvent(float(row[0]), Instrument(int(row[1])), MarketEventOperation[row[2]],
-                                     int(row[3]), Side[row[4]] if row[4] else None,
-                                     int(float(row[5])) if row[5] else 0, int(float(row[6]) * INPUT_SCALING) if row[6] else 0,
-                                     Lifespan[row[7]] if row[7] else None))
-            fifo.put(None)
-
-        self.event_loop.call_soon_threadsafe(self.on_reader_done, csv_reader.line_num - 1)
+            count = self.__queue_chunks(csv_market_event_chunks(market_data, header))
+        self.event_loop.call_soon_threadsafe(self.on_reader_done, count)
+
+    def __queue_chunks(self, chunks: Iterable[List[MarketEvent]]) -> int:
+        """Place chunks of order events in the queue and return the number of events."""
+        fifo = self.queue
+        start_time: float = self.start_time
+        count: int = 0
+
+        for chunk in chunks:
+            if start_time:
+                # Events before the start time happen as soon as the market opens
+                for evt in chunk:
+                    evt.time = evt.time - start_time if evt.time > start_time else 0.0
+            fifo.put(chunk)
+            count += len(chunk)
+        fifo.put(None)
+
+        return count
+
+    def __load_checkpoint(self, filename: str, binary: bool) -> Optional[Dict[str, Any]]:
+        """Return the latest checkpoint at or before the start time, building the index if need be."""
+        index_filename = market_data_index_filename(self.filename)
+        stat = os.stat(filename)
+        index: Optional[Dict[str, Any]] = None
+        try:
+            with open(index_filename) as index_file:
+                index = json.load(index_file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning("ignoring invalid market data index file: filename='%s'", index_filename, exc_info=e)
+
+        if (not isinstance(index, dict) or index.get("Version") != MARKET_DATA_INDEX_VERSION
+                or index.get("Source") != os.path.basename(filename) or index.get("Size") != stat.st_size
+                or index.get("ModifiedTime") != stat.st_mtime or index.get("Interval") != CHECKPOINT_INTERVAL):
+            self.logger.info("building market data index file: filename='%s'", index_filename)
+            index = build_market_data_index(filename, binary, CHECKPOINT_INTERVAL)
+            try:
+                with open(index_filename + ".tmp", "w") as index_file:
+                    json.dump(index, index_file)
+                os.replace(index_filename + ".tmp", index_filename)
+            except OSError as e:
+                self.logger.warning("failed to write market data index file: filename='%s'", index_filename,
+                                    exc_info=e)
+
+        checkpoint: Optional[Dict[str, Any]] = None
+        for c in index["Checkpoints"]:
+            if c["Time"] > self.start_time:
+                break
+            checkpoint = c
+        return checkpoint
+
+    def __market_data_source(self) -> Tuple[str, bool]:
+        """Return the name of the market data file to read and whether it is a binary file.
+
+        If there is a binary version of the market data file that is at least
+        as new as the CSV file, then it is read instead of the CSV file.
+        """
+        binary_filename = binary_market_data_filename(self.filename)
+        if os.path.isfile(binary_filename) and (not os.path.exists(self.filename) or os.path.getmtime(binary_filename)
+                                                >= os.path.getmtime(self.filename)):
+            try:
+                with open(binary_filename, "rb") as market_data:
+                    header = market_data.read(MARKET_DATA_HEADER.size)
+            except OSError as e:
+                self.logger.error("failed to open market data file: filename='%s'" % binary_filename, exc_info=e)
+                raise
+            if len(header) == MARKET_DATA_HEADER.size and MARKET_DATA_HEADER.unpack(header)[0] == MARKET_DATA_MAGIC:
+                return binary_filename, True
+            self.logger.warning("ignoring invalid binary market data file: filename='%s'", binary_filename)
+        return self.filename, False
+
+    def __restore_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Restore the order books from a checkpoint."""
+        for book, instrument, state in ((self.future_book, Instrument.FUTURE, checkpoint["Future"]),
+                                        (self.etf_book, Instrument.ETF, checkpoint["Etf"])):
+            last_traded_price, orders = state
+            book.restore(0.0, last_traded_price,
+                         (self.order_pool.acquire(order_id, instrument, Lifespan.GOOD_FOR_DAY, Side(side), price,
+                                                  volume, self) for order_id, side, price, volume in orders))
 
     def start(self):
-        """Start the market events reader thread"""
+        """Start the market events reader thread.
+
+        If a start time was given, the order books are restored from the
+        latest checkpoint before the start time and the market events after
+        the checkpoint are replayed, with the start time becoming time zero.
+        """
+        filename, binary = self.__market_data_source()
+        checkpoint: Optional[Dict[str, Any]] = None
+        if self.start_time:
+            checkpoint = self.__load_checkpoint(filename, binary)
+            if checkpoint is not None:
+                self.logger.info("starting from checkpoint: time=%.3f start_time=%.3f", checkpoint["Time"],
+                                 self.start_time)
+                self.__restore_checkpoint(checkpoint)
+
         try:
-            market_data = open(self.filename)
+            if binary:
+                market_data = open(filename, "rb")
+            else:
+                market_data = open_market_data(filename)
+                if numpy is None:
+                    if checkpoint is not None:
+                        market_data.seek(checkpoint["Offset"])
+                    market_data = io.TextIOWrapper(market_data, newline="")
         except OSError as e:
-            self.logger.error("failed to open market data file: filename='%s'" % self.filename, exc_info=e)
+            self.logger.error("failed to open market data file: filename='%s'" % filename, exc_info=e)
             raise
+
+        if binary:
+            self.logger.info("reading binary market data file: filename='%s'", filename)
+            args = (market_data, checkpoint["Event"] if checkpoint else 0)
+            self.reader_task = threading.Thread(target=self.binary_reader, args=args, daemon=True, name="reader")
+        elif numpy is not None:
+            args = (market_data, checkpoint["Event"] if checkpoint else 0, checkpoint["Offset"] if checkpoint else 0)
+            self.reader_task = threading.Thread(target=self.array_reader, args=args, daemon=True, name="reader")
         else:
-            self.reader_task = threading.Thread(target=self.reader, args=(market_data,), daemon=True, name="reader")
-            self.reader_task.start()
+            args = (market_data, checkpoint is None)
+            self.reader_task = threading.Thread(target=self.reader, args=args, daemon=True, name="reader")
+        self.reader_task.start()
@@ -16,15 +16,41 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 import asyncio
+import bisect
 import csv
 import enum
+import json
 import logging
+import math
+import mmap
+import os
 import queue
+import struct
 import threading
+import time
 
-from typing import Any, Callable, List, Optional, TextIO, Union
+from typing import (Any, BinaryIO, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, TextIO, Tuple,
+                    Union)
 
-from .types import Instrument, Lifespan, Side
+from .types import INSTRUMENTS_BY_VALUE, LIFESPANS_BY_VALUE, SIDES_BY_VALUE, Instrument, Lifespan, Side
+
+BINARY_MATCH_EVENTS_SUFFIX = ".bin"
+MATCH_EVENTS_CSV_HEADER = ("Time", "Competitor", "Operation", "OrderId", "Instrument", "Side", "Volume", "Price",
+                           "Lifespan", "Fee")
+MATCH_EVENTS_INDEX_INTERVAL = 1.0  # Seconds between the entries in the index of a segmented match events file
+MATCH_EVENTS_INDEX_SUFFIX = ".idx"
+MATCH_EVENTS_INDEX_VERSION = 1
+
+# A binary match events journal is the magic number followed by fixed-width records. The first time a
+# competitor appears, its events are preceded by a record with the NAME_OPERATION and the length of its
+# name in the order id field, which is followed by the name padded to a whole number of records.
+MATCH_EVENTS_MAGIC = b"RTGME002"
+# Time, operation, competitor, order id, instrument, side, volume, price, lifespan, fee
+MATCH_EVENT_RECORD = struct.Struct("<dBHqBBidBi")
+FLOAT_PRICE = 0x80  # Operation flag of an event with a price that is a float rather than an int
+NAME_OPERATION = 0x7F  # Operation of a record that names a competitor
+NO_FEE = -1 << 31  # Fee of an event that has none
+NO_VALUE = 255  # Instrument, side or lifespan of an event that has none
 
 
 class MatchEventOperation(enum.IntEnum):
@@ -68,65 +94,471 @@ class MatchEvent:
                      self.fee if self.fee is not None else None))
 
 
+class CompetitorCallbacks(dict):
+    """The callbacks for one match event operation keyed by competitor name.
+
+    Competitors that no listener has named get the callbacks that are
+    subscribed to every competitor.
+    """
+
+    def __init__(self, everyone: Tuple[Callable[[MatchEvent], None], ...]):
+        """Initialise a new instance of the CompetitorCallbacks class."""
+        super().__init__()
+        self.everyone: Tuple[Callable[[MatchEvent], None], ...] = everyone
+
+    def __missing__(self, name: str) -> Tuple[Callable[[MatchEvent], None], ...]:
+        """Return (and remember) the callbacks for a competitor that no listener has named."""
+        self[name] = self.everyone
+        return self.everyone
+
+
+def convert_match_events(journal_filename: str, csv_filename: str) -> int:
+    """Convert a binary match events journal to a CSV file and return the number of events."""
+    count = 0
+    with open(journal_filename, "rb") as journal, open(csv_filename, "w", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(MATCH_EVENTS_CSV_HEADER)
+        for evt in read_binary_match_events(journal):
+            count += 1
+            csv_writer.writerow(evt)
+    return count
+
+
+def is_match_events_journal(filename: str) -> bool:
+    """Return True if the named file is a binary match events journal."""
+    with open(filename, "rb") as match_events_file:
+        return match_events_file.read(len(MATCH_EVENTS_MAGIC)) == MATCH_EVENTS_MAGIC
+
+
+def match_events_index_filename(filename: str) -> str:
+    """Return the name of the index file for a segmented match events file."""
+    return os.path.splitext(filename)[0] + MATCH_EVENTS_INDEX_SUFFIX
+
+
+def match_events_segment_filename(filename: str, number: int) -> str:
+    """Return the name of the given segment of a segmented match events file."""
+    stem, suffix = os.path.splitext(filename)
+    return "%s.%04d%s" % (stem, number, suffix)
+
+
+def open_match_events_file(filename: str, buffer_size: int) -> Union["MatchEventsCsvFile", "MatchEventsJournalFile"]:
+    """Open a match events file for writing, as a binary journal if its name ends in '.bin' and as CSV otherwise."""
+    if filename.endswith(BINARY_MATCH_EVENTS_SUFFIX):
+        return MatchEventsJournalFile(filename, buffer_size)
+    return MatchEventsCsvFile(filename, buffer_size)
+
+
+def read_binary_match_events(journal: BinaryIO, offset: int = 0,
+                             names: Optional[List[str]] = None) -> Iterator[MatchEvent]:
+    """Yield the match events in a binary match events journal.
+
+    To start part way through the journal, give the byte offset of a match
+    event and the names of the competitors in the journal in the order of
+    their name records (as held by the index of a segmented match events
+    file).
+    """
+    instruments: Dict[int, Optional[Instrument]] = {**INSTRUMENTS_BY_VALUE, NO_VALUE: None}
+    operations: Dict[int, MatchEventOperation] = {o.value: o for o in MatchEventOperation}
+    sides: Dict[int, Optional[Side]] = {**SIDES_BY_VALUE, NO_VALUE: None}
+    lifespans: Dict[int, Optional[Lifespan]] = {**LIFESPANS_BY_VALUE, NO_VALUE: None}
+    competitors: Dict[int, str] = dict(enumerate(names)) if names is not None else dict()
+
+    record_size = MATCH_EVENT_RECORD.size
+    unpack_from = MATCH_EVENT_RECORD.unpack_from
+    with mmap.mmap(journal.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(MATCH_EVENTS_MAGIC)] != MATCH_EVENTS_MAGIC:
+            raise ValueError("not a binary match events journal")
+        position = max(offset, len(MATCH_EVENTS_MAGIC))
+        end = len(data) - record_size  # A partly written record at the end is ignored
+        while position <= end:
+            t, o, c, order_id, i, s, volume, price, l, fee = unpack_from(data, position)
+            position += record_size
+            if o == NAME_OPERATION:
+                competitors[c] = data[position:position + order_id].decode()
+                position += -(-order_id // record_size) * record_size
+                continue
+            if o & FLOAT_PRICE:
+                o ^= FLOAT_PRICE
+            else:
+                price = int(price) if not math.isnan(price) else None
+            yield MatchEvent(t, competitors[c], operations[o], order_id, instruments[i], sides[s], volume, price,
+                             lifespans[l], fee if fee != NO_FEE else None)
+
+
+def read_csv_match_events(match_events_file: TextIO, header: bool = True) -> Iterator[MatchEvent]:
+    """Yield the match events in a CSV match events file."""
+    operations: Dict[str, MatchEventOperation] = {n: o for o, n in MatchEvent.OPERATION_NAMES.items()}
+
+    reader = csv.reader(match_events_file)
+    if header:
+        next(reader, None)
+
+    for row in reader:
+        price: Optional[Union[int, float]] = None
+        if row[7]:
+            price = int(row[7]) if row[7].lstrip("-").isdigit() else float(row[7])
+        yield MatchEvent(float(row[0]), row[1], operations[row[2]], int(row[3]),
+                         Instrument(int(row[4])) if row[4] else None, Side[row[5]] if row[5] else None, int(row[6]),
+                         price, Lifespan[row[8]] if row[8] else None, int(row[9]) if row[9] else None)
+
+
+def read_match_events_window(index_filename: str, start_time: float = 0.0,
+                             end_time: float = math.inf) -> Iterator[MatchEvent]:
+    """Yield the match events from start_time up to end_time in a segmented match events file.
+
+    Only the segments that cover the window are opened, and the first is
+    read from the latest index entry at or before the start time.
+    """
+    with open(index_filename, "r") as index_file:
+        index = json.load(index_file)
+    if index.get("Version") != MATCH_EVENTS_INDEX_VERSION:
+        raise ValueError("unsupported match events index version")
+
+    entries: List[List[Any]] = index["Entries"]
+    directory = os.path.dirname(index_filename)
+    first = max(bisect.bisect_right([e[0] for e in entries], start_time - 0.000001) - 1, 0)
+
+    for number in range(entries[first][1] if entries else 0, len(index["Segments"])):
+        segment = index["Segments"][number]
+        if segment["Start"] >= end_time:
+            return
+        offset = next(e[2] for e in entries[first:] if e[1] == number)
+        filename = os.path.join(directory, segment["File"])
+        if "Competitors" in segment:
+            segment_file = open(filename, "rb")
+            events = read_binary_match_events(segment_file, offset, segment["Competitors"])
+        else:
+            segment_file = open(filename, "r", newline="")
+            segment_file.seek(offset)
+            events = read_csv_match_events(segment_file, header=False)
+        with segment_file:
+            for evt in events:
+                # Compare times as they appear in CSV files so both formats give the same window
+                now = round(evt.time, 6)
+                if now >= end_time:
+                    return
+                if now >= start_time:
+                    yield evt
+
+
 class MatchEvents:
-    """A clearing house of match events."""
+    """A clearing house of match events.
+
+    Listeners subscribe to the match events with particular operations
+    and/or for particular competitors. Match events that no listener has
+    subscribed to are not created.
+    """
 
     def __init__(self):
         """Initialise a new instance of the MatchEvents class."""
         self.logger = logging.getLogger("MATCH_EVENTS")
 
-        # Callbacks
-        self.event_occurred: List[Callable[[MatchEvent], None]] = list()
+        self.__subscriptions: List[Tuple[Callable[[MatchEvent], None], FrozenSet[MatchEventOperation],
+                                         Optional[FrozenSet[str]]]] = list()
+        self.__amend_callbacks: CompetitorCallbacks = CompetitorCallbacks(())
+        self.__cancel_callbacks: CompetitorCallbacks = CompetitorCallbacks(())
+        self.__hedge_callbacks: CompetitorCallbacks = CompetitorCallbacks(())
+        self.__insert_callbacks: CompetitorCallbacks = CompetitorCallbacks(())
+        self.__trade_callbacks: CompetitorCallbacks = CompetitorCallbacks(())
 
     def amend(self, now: float, name: str, order_id: int, diff: int) -> None:
         """Create a new amend event."""
-        event = MatchEvent(now, name, MatchEventOperation.AMEND, order_id, None, None, diff, None, None, None)
-        for callback in self.event_occurred:
-            callback(event)
+        callbacks = self.__amend_callbacks[name]
+        if callbacks:
+            event = MatchEvent(now, name, MatchEventOperation.AMEND, order_id, None, None, diff, None, None, None)
+            for callback in callbacks:
+                callback(event)
 
     def cancel(self, now: float, name: str, order_id: int, diff: int) -> None:
         """Create a new cancel event."""
-        event = MatchEvent(now, name, MatchEventOperation.CANCEL, order_id, None, None, diff, None, None, None)
-        for callback in self.event_occurred:
-            callback(event)
+        callbacks = self.__cancel_callbacks[name]
+        if callbacks:
+            event = MatchEvent(now, name, MatchEventOperation.CANCEL, order_id, None, None, diff, None, None, None)
+            for callback in callbacks:
+                callback(event)
 
     def fill(self, now: float, name: str, order_id: int, instrument: Instrument, side: Side, price: int, diff: int,
              fee: int) -> None:
         """Create a new fill event."""
-        for callback in self.event_occurred:
-            callback(MatchEvent(now, name, MatchEventOperation.TRADE, order_id, instrument, side, diff, price,
-                                None, fee))
+        callbacks = self.__trade_callbacks[name]
+        if callbacks:
+            event = MatchEvent(now, name, MatchEventOperation.TRADE, order_id, instrument, side, diff, price, None,
+                               fee)
+            for callback in callbacks:
+                callback(event)
 
     def hedge(self, now: float, name: str, order_id: int, instrument: Instrument, side: Side, price: float,
               volume: int) -> None:
         """Create a new fill event."""
-        for callback in self.event_occurred:
-            callback(MatchEvent(now, name, MatchEventOperation.HEDGE, order_id, instrument, side, volume, price,
-                                None, None))
+        callbacks = self.__hedge_callbacks[name]
+        if callbacks:
+            event = MatchEvent(now, name, MatchEventOperation.HEDGE, order_id, instrument, side, volume, price, None,
+                               None)
+            for callback in callbacks:
+                callback(event)
 
     def insert(self, now: float, name: str, order_id: int, instrument: Instrument, side: Side, volume: int,
                price: int, lifespan: Lifespan) -> None:
         """Create a new insert event."""
-        event = MatchEvent(now, name, MatchEventOperation.INSERT, order_id, instrument, side, volume, price,
-                           lifespan, None)
-        for callback in self.event_occurred:
-            callback(event)
+        callbacks = self.__insert_callbacks[name]
+        if callbacks:
+            event = MatchEvent(now, name, MatchEventOperation.INSERT, order_id, instrument, side, volume, price,
+                               lifespan, None)
+            for callback in callbacks:
+                callback(event)
+
+    def subscribe(self, callback: Callable[[MatchEvent], None],
+                  operations: Optional[Iterable[MatchEventOperation]] = None,
+                  competitors: Optional[Iterable[str]] = None) -> None:
+        """Call the callback for match events with the given operations for the given competitors.
+
+        By default, the callback is called for every operation and every
+        competitor (including the market, which has an empty name).
+        """
+        self.__subscriptions.append((callback, frozenset(operations if operations is not None
+                                                         else MatchEventOperation),
+                                     frozenset(competitors) if competitors is not None else None))
+        self.__update_callbacks()
+
+    def unsubscribe(self, callback: Callable[[MatchEvent], None]) -> None:
+        """Stop calling the callback for match events."""
+        self.__subscriptions = [s for s in self.__subscriptions if s[0] != callback]
+        self.__update_callbacks()
+
+    def __update_callbacks(self) -> None:
+        """Rebuild the callbacks for each operation and competitor from the subscriptions."""
+        names: Set[str] = set()
+        for _, _, competitors in self.__subscriptions:
+            if competitors is not None:
+                names.update(competitors)
+
+        callbacks: Dict[MatchEventOperation, CompetitorCallbacks] = dict()
+        for operation in MatchEventOperation:
+            subscriptions = [(c, n) for c, o, n in self.__subscriptions if operation in o]
+            callbacks[operation] = CompetitorCallbacks(tuple(c for c, n in subscriptions if n is None))
+            for name in names:
+                callbacks[operation][name] = tuple(c for c, n in subscriptions if n is None or name in n)
+
+        self.__amend_callbacks = callbacks[MatchEventOperation.AMEND]
+        self.__cancel_callbacks = callbacks[MatchEventOperation.CANCEL]
+        self.__hedge_callbacks = callbacks[MatchEventOperation.HEDGE]
+        self.__insert_callbacks = callbacks[MatchEventOperation.INSERT]
+        self.__trade_callbacks = callbacks[MatchEventOperation.TRADE]
+
+
+class MatchEventsCsvFile:
+    """A CSV file that match events are written to."""
+
+    def __init__(self, filename: str, buffer_size: int):
+        """Initialise a new instance of the MatchEventsCsvFile class."""
+        self.file: TextIO = open(filename, "w", buffering=buffer_size, newline="")
+        self.csv_writer = csv.writer(self.file)
+        self.csv_writer.writerow(MATCH_EVENTS_CSV_HEADER)
+
+    def close(self) -> None:
+        """Close the file."""
+        self.file.close()
+
+    def flush(self) -> None:
+        """Write everything that has been buffered to the file."""
+        self.file.flush()
+
+    def tell(self) -> int:
+        """Return the byte offset at which the next match event will be written."""
+        return self.file.tell()
+
+    def write(self, events: List[MatchEvent]) -> None:
+        """Write a list of match events."""
+        self.csv_writer.writerows(events)
+
+
+class MatchEventsJournalFile:
+    """A binary match events journal that match events are written to in blocks."""
+
+    def __init__(self, filename: str, buffer_size: int):
+        """Initialise a new instance of the MatchEventsJournalFile class."""
+        self.competitors: Dict[str, int] = dict()
+        self.file: BinaryIO = open(filename, "wb")
+        self.logger = logging.getLogger("MATCH_EVENTS")
+        self.file.write(MATCH_EVENTS_MAGIC)
+
+        self.__buffer: bytearray = bytearray(max(buffer_size // MATCH_EVENT_RECORD.size, 1) * MATCH_EVENT_RECORD.size)
+        self.__offset: int = 0
+
+    def close(self) -> None:
+        """Write out the buffer and close the file."""
+        with self.file:
+            self.file.write(memoryview(self.__buffer)[:self.__offset])
+        self.__offset = 0
+
+    def flush(self) -> None:
+        """Write out the buffer, even if it is not full."""
+        self.file.write(memoryview(self.__buffer)[:self.__offset])
+        self.file.flush()
+        self.__offset = 0
+
+    def tell(self) -> int:
+        """Return the byte offset at which the next match event will be written."""
+        return self.file.tell() + self.__offset
+
+    def write(self, events: List[MatchEvent]) -> None:
+        """Pack a list of match events into the buffer, writing it out whenever it fills.
+
+        A match event with a field that does not fit in a record (such as an
+        order id from a market data file of 2**63 or more) is logged and left
+        out of the journal.
+        """
+        buffer = self.__buffer
+        competitors = self.competitors
+        journal_file = self.file
+        offset = self.__offset
+        pack_into = MATCH_EVENT_RECORD.pack_into
+        record_size = MATCH_EVENT_RECORD.size
+
+        for evt in events:
+            competitor = competitors.get(evt.competitor)
+            if competitor is None:
+                competitor = competitors[evt.competitor] = len(competitors)
+                name = evt.competitor.encode()
+                journal_file.write(memoryview(buffer)[:offset])
+                journal_file.write(MATCH_EVENT_RECORD.pack(evt.time, NAME_OPERATION, competitor, len(name), 0, 0, 0,
+                                                           0.0, 0, 0))
+                journal_file.write(name.ljust(-(-len(name) // record_size) * record_size, b"\0"))
+                offset = 0
+
+            operation = evt.operation | FLOAT_PRICE if type(evt.price) is float else evt.operation
+            try:
+                pack_into(buffer, offset, evt.time, operation, competitor, evt.order_id,
+                          evt.instrument if evt.instrument is not None else NO_VALUE,
+                          evt.side if evt.side is not None else NO_VALUE, evt.volume,
+                          evt.price if evt.price is not None else math.nan,
+                          evt.lifespan if evt.lifespan is not None else NO_VALUE,
+                          evt.fee if evt.fee is not None else NO_FEE)
+            except struct.error as e:
+                self.logger.error("match event cannot be written to the journal: time=%.6f competitor='%s'"
+                                  " operation=%s order_id=%d: %s", evt.time, evt.competitor, evt.operation.name,
+                                  evt.order_id, e)
+                continue
+            offset += record_size
+            if offset == len(buffer):
+                journal_file.write(buffer)
+                offset = 0
+
+        self.__offset = offset
+
+
+class SegmentedMatchEventsFile:
+    """A series of match events files, each holding the events for a period of time, with an index.
+
+    Each segment is a complete CSV file or binary match events journal
+    named after the match events file with the segment number before the
+    suffix (for example, "match_events.0003.csv"). The index is a JSON file
+    (for example, "match_events.idx") that lists the segments and holds
+    the segment and byte offset of the first match event in every second.
+    """
+
+    def __init__(self, filename: str, buffer_size: int, segment_interval: float):
+        """Initialise a new instance of the SegmentedMatchEventsFile class."""
+        self.buffer_size: int = buffer_size
+        self.filename: str = filename
+        self.index: Dict[str, Any] = {"Version": MATCH_EVENTS_INDEX_VERSION, "SegmentInterval": segment_interval,
+                                      "IndexInterval": MATCH_EVENTS_INDEX_INTERVAL, "Segments": list(),
+                                      "Entries": list()}
+        self.index_filename: str = match_events_index_filename(filename)
+        self.segment_interval: float = segment_interval
+
+        self.__file: Optional[Union[MatchEventsCsvFile, MatchEventsJournalFile]] = None
+        self.__next_entry: float = 0.0
+        self.__segment_end: float = 0.0
+
+        self.__write_index()
+
+    def close(self) -> None:
+        """Close the current segment and write the index."""
+        if self.__file is not None:
+            self.__close_segment()
+            self.__file = None
+        self.__write_index()
+
+    def flush(self) -> None:
+        """Write everything that has been buffered to the current segment."""
+        if self.__file is not None:
+            self.__file.flush()
+
+    def write(self, events: List[MatchEvent]) -> None:
+        """Write a list of match events, starting new segments and adding index entries as time passes."""
+        entries: List[Tuple[float, int, int]] = self.index["Entries"]
+        segments: List[Dict[str, Any]] = self.index["Segments"]
+
+        first = 0
+        for i, evt in enumerate(events):
+            if evt.time >= self.__next_entry:
+                if i > first:
+                    self.__file.write(events[first:i])
+                    segments[-1]["Events"] += i - first
+                first = i
+                if evt.time >= self.__segment_end:
+                    self.__start_segment(evt.time)
+                entries.append((evt.time, len(segments) - 1, self.__file.tell()))
+                self.__next_entry = min((evt.time // MATCH_EVENTS_INDEX_INTERVAL + 1) * MATCH_EVENTS_INDEX_INTERVAL,
+                                        self.__segment_end)
+
+        if len(events) > first:
+            self.__file.write(events[first:])
+            segments[-1]["Events"] += len(events) - first
+
+    def __close_segment(self) -> None:
+        """Close the current segment and record its competitors."""
+        self.__file.close()
+        if isinstance(self.__file, MatchEventsJournalFile):
+            self.index["Segments"][-1]["Competitors"] = list(self.__file.competitors)
+
+    def __start_segment(self, now: float) -> None:
+        """Close the current segment, if any, and start the segment for the given time."""
+        if self.__file is not None:
+            self.__close_segment()
+            self.__write_index()
+
+        number = int(now // self.segment_interval)
+        filename = match_events_segment_filename(self.filename, number)
+        self.__file = open_match_events_file(filename, self.buffer_size)
+        self.__segment_end = (number + 1) * self.segment_interval
+        self.index["Segments"].append({"File": os.path.basename(filename), "Start": number * self.segment_interval,
+                                       "Events": 0})
+
+    def __write_index(self) -> None:
+        """Write the index file."""
+        with open(self.index_filename, "w") as index_file:
+            json.dump(self.index, index_file)
 
 
 class MatchEventsWriter:
     """A processor of match events that it writes to a file."""
 
-    def __init__(self, match_events: MatchEvents, filename: str, loop: asyncio.AbstractEventLoop):
-        """Initialise a new instance of the MatchEvents class."""
+    def __init__(self, match_events: MatchEvents, filename: str, loop: asyncio.AbstractEventLoop,
+                 buffer_size: int = 1 << 20, flush_interval: float = 1.0, segment_interval: Optional[float] = None):
+        """Initialise a new instance of the MatchEvents class.
+
+        Match events are collected into batches which are passed to the
+        writer thread by the flush method. The writer thread writes each
+        batch in one go and flushes the file whenever it has nothing to do
+        for flush_interval seconds. If a segment interval is given, the
+        match events are written to a series of segment files with an index
+        (see SegmentedMatchEventsFile).
+        """
+        self.batch: List[MatchEvent] = list()
+        self.buffer_size: int = buffer_size
         self.event_loop: asyncio.AbstractEventLoop = loop
         self.filename: str = filename
         self.finished: bool = False
+        self.flush_interval: float = flush_interval
         self.logger = logging.getLogger("MATCH_EVENTS")
         self.match_events: MatchEvents = match_events
         self.queue: queue.Queue = queue.Queue()
+        self.segment_interval: Optional[float] = segment_interval
         self.writer_task: Optional[threading.Thread] = None
 
-        match_events.event_occurred.append(self.queue.put)
+        match_events.subscribe(self.batch.append)
 
         # Callbacks
         self.task_complete: List[Callable[[Any], None]] = list()
@@ -139,10 +571,17 @@ class MatchEventsWriter:
 
     def finish(self) -> None:
         """Indicate the the series of events is complete."""
-        self.match_events.event_occurred.remove(self.queue.put)
+        self.match_events.unsubscribe(self.batch.append)
+        self.flush()
         self.queue.put(None)
         self.finished = True
 
+    def flush(self) -> None:
+        """Pass the match events collected since the last flush to the writer thread."""
+        if self.batch:
+            self.queue.put(self.batch.copy())
+            self.batch.clear()
+
     def on_writer_done(self, num_events: int) -> None:
         """Called when the match event writer thread is done."""
         for c in self.task_complete:
@@ -152,7 +591,10 @@ class MatchEventsWriter:
     def start(self):
         """Start the match events writer thread"""
         try:
-            match_events_file = open(self.filename, "w", newline="")
+            if self.segment_interval:
+                match_events_file = SegmentedMatchEventsFile(self.filename, self.buffer_size, self.segment_interval)
+            else:
+                match_events_file = open_match_events_file(self.filename, self.buffer_size)
         except IOError as e:
             self.logger.error("failed to open match events file: filename=%s", self.filename, exc_info=e)
             raise
@@ -161,22 +603,25 @@ class MatchEventsWriter:
                                                 name="match_events")
             self.writer_task.start()
 
-    def writer(self, match_events_file: TextIO) -> None:
+    def writer(self, match_events_file: Union[MatchEventsCsvFile, MatchEventsJournalFile,
+                                              SegmentedMatchEventsFile]) -> None:
         """Fetch match events from a queue and write them to a file"""
         count = 0
         fifo = self.queue
 
         try:
-            with match_events_file:
-                csv_writer = csv.writer(match_events_file)
-                csv_writer.writerow(("Time,Competitor,Operation,OrderId,Instrument,Side,Volume,Price,Lifespan,"
-                                     "Fee").split(','))
-
-                evt: MatchEvent = fifo.get()
-                while evt is not None:
-                    count += 1
-                    csv_writer.writerow(evt)
-                    evt = fifo.get()
+            next_flush = time.monotonic() + self.flush_interval
+            batch: Optional[List[MatchEvent]] = fifo.get()
+            while batch is not None:
+                count += len(batch)
+                match_events_file.write(batch)
+                try:
+                    batch = fifo.get(timeout=max(next_flush - time.monotonic(), 0.0))
+                except queue.Empty:
+                    match_events_file.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+                    batch = fifo.get()
         finally:
+            match_events_file.close()
             if not self.event_loop.is_closed():
                 self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
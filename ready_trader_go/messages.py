@@ -108,19 +108,51 @@ HEDGE_EVENT_MESSAGE_SIZE: int = HEADER.size + HEDGE_EVENT_MESSAGE.size
 TRADE_EVENT_MESSAGE_SIZE: int = HEADER.size + TRADE_EVENT_MESSAGE.size
 LOGIN_EVENT_MESSAGE_SIZE: int = HEADER.size + LOGIN_EVENT_MESSAGE.size
 
+# Big enough for any message (the length in the header is an unsigned short)
+RECEIVE_BUFFER_SIZE: int = 1 << 16
 
-class Connection(asyncio.Protocol):
-    """A stream-based network connection."""
+
+class Connection(asyncio.BufferedProtocol):
+    """A stream-based network connection.
+
+    Received data is written straight into a reusable buffer and messages
+    are handed to on_message without being copied. Unread data is only moved
+    to the start of the buffer when the end of the buffer is reached.
+    """
 
     def __init__(self):
         """Initialize a new instance of the Connection class."""
+        self._buffer: bytearray = bytearray(RECEIVE_BUFFER_SIZE)
+        self._buffer_view: memoryview = memoryview(self._buffer)
         self._closing: bool = False
-        self._data: bytes = b""
         self._file_number: int = 0
+        self._read_position: int = 0
+        self._write_position: int = 0
         self._connection_transport: Optional[asyncio.Transport] = None
 
         self.__logger = logging.getLogger("CONNECTION")
 
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when data has been written into the receive buffer."""
+        buffer: bytearray = self._buffer
+        upto: int = self._read_position
+        data_length: int = self._write_position + nbytes
+
+        while not self._closing and upto < data_length - HEADER_SIZE:
+            length, typ = HEADER.unpack_from(buffer, upto)
+            if upto + length > data_length:
+                break
+
+            self.on_message(typ, buffer, upto + HEADER_SIZE, length)
+
+            upto += length
+
+        if upto == data_length:
+            self._read_position = self._write_position = 0
+        else:
+            self._read_position = upto
+            self._write_position = data_length
+
     def close(self):
         """Close the connection."""
         self._closing = True
@@ -144,26 +176,18 @@ class Connection(asyncio.Protocol):
                            *(transport.get_extra_info("peername") or ("unknown", 0)))
         self._connection_transport = transport
 
-    def data_received(self, data: bytes) -> None:
-        """Called when data is received."""
-        if self._data:
-            self._data += data
-        else:
-            self._data = data
-
-        upto: int = 0
-        data_length: int = len(self._data)
-
-        while not self._closing and upto < data_length - HEADER_SIZE:
-            length, typ = HEADER.unpack_from(self._data, upto)
-            if upto + length > data_length:
-                break
-
-            self.on_message(typ, self._data, upto + HEADER_SIZE, length)
-
-            upto += length
-
-        self._data = self._data[upto:]
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Return the free part of the receive buffer."""
+        if self._write_position == len(self._buffer):
+            if self._read_position == 0:
+                # The buffer always holds a complete message unless the connection is closing
+                self._write_position = 0
+            else:
+                unread: int = self._write_position - self._read_position
+                self._buffer[:unread] = self._buffer_view[self._read_position:self._write_position].tobytes()
+                self._read_position = 0
+                self._write_position = unread
+        return self._buffer_view[self._write_position:]
 
     def on_message(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Callback when an individual message has been received."""
@@ -16,17 +16,19 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 from bisect import bisect, insort_left
-import collections
 
-from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .types import Instrument, Lifespan, Side
+from .types import Instrument, Lifespan, MarketEventOperation, Side
 
 
 MINIMUM_BID = 1
 MAXIMUM_ASK = 2 ** 31 - 1
 TOP_LEVEL_COUNT = 5
 
+# Number of ticks held in the array of a LadderOrderBook
+LADDER_SIZE = 4096
+
 
 class IOrderListener(object):
     def on_order_amended(self, now: float, order, volume_removed: int) -> None:
@@ -37,6 +39,10 @@ class IOrderListener(object):
         """Called when the order is cancelled."""
         pass
 
+    def on_order_inserted(self, now: float, order) -> None:
+        """Called when the order is about to be inserted into the order book."""
+        pass
+
     def on_order_placed(self, now: float, order) -> None:
         """Called when a good-for-day order is placed in the order book."""
         pass
@@ -47,9 +53,13 @@ class IOrderListener(object):
 
 
 class Order(object):
-    """A request to buy or sell at a given price."""
-    __slots__ = ("client_order_id", "instrument", "lifespan", "listener", "price", "remaining_volume", "side",
-                 "total_fees", "volume")
+    """A request to buy or sell at a given price.
+
+    While an order rests in an order book it is linked into the queue of its
+    price level through the level, next_order and prev_order attributes.
+    """
+    __slots__ = ("client_order_id", "instrument", "level", "lifespan", "listener", "next_order", "prev_order", "price",
+                 "remaining_volume", "side", "total_fees", "volume")
 
     def __init__(self, client_order_id: int, instrument: Instrument, lifespan: Lifespan, side: Side, price: int,
                  volume: int, listener: Optional[IOrderListener] = None):
@@ -63,6 +73,9 @@ class Order(object):
         self.total_fees: int = 0
         self.volume: int = volume
         self.listener: IOrderListener = listener
+        self.level: Optional[PriceLevel] = None
+        self.next_order: Optional[Order] = None
+        self.prev_order: Optional[Order] = None
 
     def __str__(self):
         """Return a string containing a description of this order object."""
@@ -73,25 +86,147 @@ class Order(object):
         return s % args
 
 
+class OrderPool(object):
+    """A free list of Order objects that can be reused once they are finished.
+
+    Released orders are held back until recycle is called, so that an order
+    is never reused while an order book may still be working with it.
+    """
+
+    def __init__(self):
+        """Initialise a new instance of the OrderPool class."""
+        self.__free: List[Order] = list()
+        self.__released: List[Order] = list()
+
+    def acquire(self, client_order_id: int, instrument: Instrument, lifespan: Lifespan, side: Side, price: int,
+                volume: int, listener: Optional[IOrderListener] = None) -> Order:
+        """Return an order with the given attributes, reusing a free one if possible."""
+        if self.__free:
+            order = self.__free.pop()
+            Order.__init__(order, client_order_id, instrument, lifespan, side, price, volume, listener)
+            return order
+        return Order(client_order_id, instrument, lifespan, side, price, volume, listener)
+
+    def recycle(self) -> None:
+        """Make the orders released since the last call available for reuse."""
+        self.__free.extend(self.__released)
+        self.__released.clear()
+
+    def release(self, order: Order) -> None:
+        """Return a finished order to this pool."""
+        self.__released.append(order)
+
+
+class PriceLevel(object):
+    """The orders resting at a single price, in time priority.
+
+    The orders form a doubly-linked list so that an order can be removed from
+    anywhere in the queue as soon as it is cancelled or completely filled.
+    """
+    __slots__ = ("first_order", "last_order", "price", "total_volume")
+
+    def __init__(self, price: int):
+        """Initialise a new instance of the PriceLevel class."""
+        self.first_order: Optional[Order] = None
+        self.last_order: Optional[Order] = None
+        self.price: int = price
+        self.total_volume: int = 0
+
+    def append(self, order: Order) -> None:
+        """Add an order to the back of the queue for this level."""
+        order.level = self
+        order.prev_order = self.last_order
+        if self.last_order is None:
+            self.first_order = order
+        else:
+            self.last_order.next_order = order
+        self.last_order = order
+
+    def remove(self, order: Order) -> None:
+        """Remove an order from the queue for this level."""
+        if order.prev_order is None:
+            self.first_order = order.next_order
+        else:
+            order.prev_order.next_order = order.next_order
+        if order.next_order is None:
+            self.last_order = order.prev_order
+        else:
+            order.next_order.prev_order = order.prev_order
+        order.level = order.next_order = order.prev_order = None
+
+
+class TradeReport(object):
+    """A summary of the trades made by one aggressive order."""
+    __slots__ = ("fees", "last_price", "levels", "order", "value", "volume")
+
+    def __init__(self, order: Order):
+        """Initialise a new instance of the TradeReport class."""
+        self.fees: int = 0
+        self.last_price: int = 0
+        self.levels: int = 0
+        self.order: Order = order
+        self.value: int = 0
+        self.volume: int = 0
+
+    def __str__(self):
+        """Return a string containing a description of this trade report."""
+        args = (self.order.client_order_id, self.levels, self.volume, self.average_price(), self.fees)
+        return "{client_order_id=%d, levels=%d, volume=%d, average_price=%.2f, fees=%d}" % args
+
+    def average_price(self) -> float:
+        """Return the volume weighted average price of the trades."""
+        return self.value / self.volume if self.volume else 0.0
+
+
 class OrderBook(object):
-    """A collection of orders arranged by the price-time priority principle."""
+    """A collection of orders arranged by the price-time priority principle.
+
+    The version attribute is incremented whenever a change is made to one of
+    the top TOP_LEVEL_COUNT levels on either side of the book, so callers can
+    tell whether the result of top_levels has changed since they last looked.
 
-    def __init__(self, instrument: Instrument, maker_fee: float, taker_fee: float):
+    If coalesce_trades is True, trade_occurred is signalled once for each
+    aggressive order that trades, rather than once for each price level it
+    trades with, and trade_reported is signalled with a TradeReport
+    describing all of the trades made by that order.
+    """
+
+    def __init__(self, instrument: Instrument, maker_fee: float, taker_fee: float, coalesce_trades: bool = False):
         """Initialise a new instance of the OrderBook class."""
+        self.coalesce_trades: bool = coalesce_trades
         self.instrument: Instrument = instrument
         self.maker_fee: float = maker_fee
         self.taker_fee: float = taker_fee
 
         self.__ask_prices: List[int] = []
-        self.__ask_ticks: Dict[int, int] = collections.defaultdict(int)
         self.__bid_prices: List[int] = []
-        self.__bid_ticks: Dict[int, int] = collections.defaultdict(int)
+        self.__defer_trades: bool = False
         self.__last_traded_price: Optional[int] = None
-        self.__levels: Dict[int, Deque[Order]] = {}
-        self.__total_volumes: Dict[int, int] = {}
+        self.__levels: Dict[int, PriceLevel] = {}
+        self.__report: Optional[TradeReport] = None
+        self.__trades_deferred: bool = False
+
+        # Volume traded at the best TOP_LEVEL_COUNT prices on each side since
+        # trade ticks were last taken, best first (unused entries are zero)
+        self.__ask_tick_prices: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__ask_tick_volumes: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__bid_tick_prices: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__bid_tick_volumes: List[int] = [0] * TOP_LEVEL_COUNT
+
+        # Top levels as of the last call to top_levels and the deepest price
+        # on each side of them (a change beyond these cannot affect them)
+        self.__ask_limit: int = MAXIMUM_ASK
+        self.__bid_limit: int = 0
+        self.__top_ask_prices: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__top_ask_volumes: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__top_bid_prices: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__top_bid_volumes: List[int] = [0] * TOP_LEVEL_COUNT
+        self.__top_version: int = -1
+        self.version: int = 0
 
         # Signals
         self.trade_occurred: List[Callable[[Any], None]] = list()
+        self.trade_reported: List[Callable[[Any, TradeReport], None]] = list()
 
     def __str__(self):
         """Return a string representation of this order book."""
@@ -110,11 +245,43 @@ class OrderBook(object):
             fill_volume = order.volume - order.remaining_volume
             diff = order.volume - (fill_volume if new_volume < fill_volume else new_volume)
             self.remove_volume_from_level(order.price, diff, order.side)
+            self.__touch(order.price, order.side)
             order.volume -= diff
             order.remaining_volume -= diff
+            if order.remaining_volume == 0:
+                order.level.remove(order)
             if order.listener:
                 order.listener.on_order_amended(now, order, diff)
 
+    def apply_batch(self, events: Iterable[Tuple[float, MarketEventOperation, Order, int]]) -> None:
+        """Apply a sequence of events to this order book.
+
+        Each event is a tuple of time, operation, order and volume delta. An
+        insert event inserts the order, a cancel event cancels it and an amend
+        event changes its volume by the (negative) volume delta. Rather than
+        signalling each trade as it happens, trade_occurred is signalled once
+        after the whole batch has been applied if there were any trades.
+        """
+        insert, cancel, amend = self.insert, self.cancel, self.amend
+        insert_operation, cancel_operation = MarketEventOperation.INSERT, MarketEventOperation.CANCEL
+
+        self.__defer_trades = True
+        try:
+            for now, operation, order, volume_delta in events:
+                if operation is insert_operation:
+                    insert(now, order)
+                elif operation is cancel_operation:
+                    cancel(now, order)
+                else:
+                    amend(now, order, order.volume + volume_delta)
+        finally:
+            self.__defer_trades = False
+
+        if self.__trades_deferred:
+            self.__trades_deferred = False
+            for callback in self.trade_occurred:
+                callback(self)
+
     def best_ask(self) -> Optional[int]:
         """Return the current best ask price, or None if there are no ask orders."""
         return -self.__ask_prices[-1] if self.__ask_prices else None
@@ -127,17 +294,48 @@ class OrderBook(object):
         """Cancel an order in this order book."""
         if order.remaining_volume > 0:
             self.remove_volume_from_level(order.price, order.remaining_volume, order.side)
+            self.__touch(order.price, order.side)
+            order.level.remove(order)
             remaining = order.remaining_volume
             order.remaining_volume = 0
             if order.listener:
                 order.listener.on_order_cancelled(now, order, remaining)
 
+    def checkpoint(self) -> Tuple[Optional[int], List[Tuple[int, int, int, int]]]:
+        """Return the last traded price and the orders resting in this order book.
+
+        Each order is given as (client_order_id, side, price, remaining_volume)
+        and the orders at each price level are in time priority.
+        """
+        orders: List[Tuple[int, int, int, int]] = list()
+        for side in (Side.SELL, Side.BUY):
+            for level in self._levels(side):
+                order = level.first_order
+                while order is not None:
+                    orders.append((order.client_order_id, order.side.value, order.price, order.remaining_volume))
+                    order = order.next_order
+        return self.__last_traded_price, orders
+
     def insert(self, now: float, order: Order) -> None:
         """Insert a new order into this order book."""
-        if order.side == Side.SELL and self.__bid_prices and order.price <= self.__bid_prices[-1]:
-            self.trade_ask(now, order)
-        elif order.side == Side.BUY and self.__ask_prices and order.price >= self.__ask_prices[-1]:
-            self.trade_bid(now, order)
+        if order.listener:
+            order.listener.on_order_inserted(now, order)
+
+        if order.side == Side.SELL:
+            best_bid = self.best_bid()
+            if best_bid is not None and order.price <= best_bid:
+                if self.coalesce_trades:
+                    self.__report = TradeReport(order)
+                self.trade_ask(now, order)
+        else:
+            best_ask = self.best_ask()
+            if best_ask is not None and order.price >= best_ask:
+                if self.coalesce_trades:
+                    self.__report = TradeReport(order)
+                self.trade_bid(now, order)
+
+        if self.__report is not None:
+            self.__send_trade_report()
 
         if order.remaining_volume > 0:
             if order.lifespan == Lifespan.FILL_AND_KILL:
@@ -147,6 +345,7 @@ class OrderBook(object):
                     order.listener.on_order_cancelled(now, order, remaining)
             else:
                 self.place(now, order)
+                self.__touch(order.price, order.side)
 
     def last_traded_price(self) -> Optional[int]:
         """Return the last traded price."""
@@ -154,47 +353,110 @@ class OrderBook(object):
 
     def midpoint_price(self) -> Optional[float]:
         """Return the midpoint price."""
-        if self.__bid_prices and self.__ask_prices:
-            return (self.__bid_prices[-1] + -self.__ask_prices[-1]) / 2.0
+        best_bid = self.best_bid()
+        best_ask = self.best_ask()
+        if best_bid is not None and best_ask is not None:
+            return (best_bid + best_ask) / 2.0
         return None
 
     def place(self, now: float, order: Order) -> None:
         """Place an order that does not match any existing order in this order book."""
         price = order.price
 
-        if price not in self.__levels:
-            self.__levels[price] = collections.deque()
-            self.__total_volumes[price] = 0
+        level = self.__levels.get(price)
+        if level is None:
+            level = self.__levels[price] = PriceLevel(price)
             if order.side == Side.SELL:
                 insort_left(self.__ask_prices, -price)
             else:
                 insort_left(self.__bid_prices, price)
 
-        self.__levels[price].append(order)
-        self.__total_volumes[price] += order.remaining_volume
+        level.append(order)
+        level.total_volume += order.remaining_volume
 
         if order.listener:
             order.listener.on_order_placed(now, order)
 
+    def queue_position(self, order: Order) -> Optional[Tuple[int, int]]:
+        """Return the number of orders and the total volume ahead of the given
+        order in the queue for its price level, or None if the order is not
+        resting in the book.
+        """
+        if order.level is None:
+            return None
+        count: int = 0
+        volume: int = 0
+        ahead: Optional[Order] = order.prev_order
+        while ahead is not None:
+            count += 1
+            volume += ahead.remaining_volume
+            ahead = ahead.prev_order
+        return count, volume
+
     def remove_volume_from_level(self, price: int, volume: int, side: Side) -> None:
-        if self.__total_volumes[price] == volume:
+        level = self.__levels[price]
+        if level.total_volume == volume:
             del self.__levels[price]
-            del self.__total_volumes[price]
             if side == Side.SELL:
                 self.__ask_prices.pop(bisect(self.__ask_prices, -price) - 1)
             elif side == Side.BUY:
                 self.__bid_prices.pop(bisect(self.__bid_prices, price) - 1)
         else:
-            self.__total_volumes[price] -= volume
+            level.total_volume -= volume
+
+    def restore(self, now: float, last_traded_price: Optional[int], orders: Iterable[Order]) -> None:
+        """Restore an empty order book from a checkpoint.
+
+        The orders must not match one another and are inserted in the order
+        given, so the orders at each price level should be in time priority.
+        """
+        for order in orders:
+            self.insert(now, order)
+        self.__last_traded_price = last_traded_price
 
     def top_levels(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
                    bid_volumes: List[int]) -> None:
         """Populate the supplied lists with the top levels for this book."""
+        if self.__top_version != self.version:
+            self._collect_top_levels(self.__top_ask_prices, self.__top_ask_volumes, self.__top_bid_prices,
+                                     self.__top_bid_volumes)
+            self.__ask_limit = self.__top_ask_prices[-1] or MAXIMUM_ASK
+            self.__bid_limit = self.__top_bid_prices[-1]
+            self.__top_version = self.version
+
+        ask_prices[:] = self.__top_ask_prices
+        ask_volumes[:] = self.__top_ask_volumes
+        bid_prices[:] = self.__top_bid_prices
+        bid_volumes[:] = self.__top_bid_volumes
+
+    def __send_trade_report(self) -> None:
+        """Signal the trades summarised by the current trade report."""
+        report: TradeReport = self.__report
+        self.__report = None
+        if report.volume == 0:
+            return
+
+        if self.__defer_trades:
+            self.__trades_deferred = True
+        else:
+            for callback in self.trade_occurred:
+                callback(self)
+        for callback in self.trade_reported:
+            callback(self, report)
+
+    def __touch(self, price: int, side: Side) -> None:
+        """Advance the version if a change at the given price could affect the top levels."""
+        if (price <= self.__ask_limit) if side == Side.SELL else (price >= self.__bid_limit):
+            self.version += 1
+
+    def _collect_top_levels(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                            bid_volumes: List[int]) -> None:
+        """Populate the supplied lists with the top levels held in this book."""
         i = 0
         j = len(self.__ask_prices) - 1
         while i < TOP_LEVEL_COUNT and j >= 0:
             ask_prices[i] = -self.__ask_prices[j]
-            ask_volumes[i] = self.__total_volumes[ask_prices[i]]
+            ask_volumes[i] = self.__levels[ask_prices[i]].total_volume
             i += 1
             j -= 1
         while i < TOP_LEVEL_COUNT:
@@ -205,67 +467,97 @@ class OrderBook(object):
         j = len(self.__bid_prices) - 1
         while i < TOP_LEVEL_COUNT and j >= 0:
             bid_prices[i] = self.__bid_prices[j]
-            bid_volumes[i] = self.__total_volumes[bid_prices[i]]
+            bid_volumes[i] = self.__levels[bid_prices[i]].total_volume
             i += 1
             j -= 1
         while i < TOP_LEVEL_COUNT:
             bid_prices[i] = bid_volumes[i] = 0
             i += 1
 
+    def _levels(self, side: Side) -> Iterator[PriceLevel]:
+        """Yield the levels on the given side of this book from best to worst."""
+        if side == Side.SELL:
+            for price in reversed(self.__ask_prices):
+                yield self.__levels[-price]
+        else:
+            for price in reversed(self.__bid_prices):
+                yield self.__levels[price]
+
     def trade_ask(self, now: float, order: Order) -> None:
         """Check to see if any existing bid orders match the specified ask order."""
-        best_bid = self.__bid_prices[-1]
+        level = self.__levels[self.__bid_prices[-1]]
 
-        while order.remaining_volume > 0 and best_bid >= order.price and self.__total_volumes[best_bid] > 0:
-            self.trade_level(now, order, best_bid)
-            if self.__total_volumes[best_bid] == 0:
-                del self.__levels[best_bid]
-                del self.__total_volumes[best_bid]
+        while order.remaining_volume > 0 and level.price >= order.price and level.total_volume > 0:
+            self.trade_level(now, order, level)
+            if level.total_volume == 0:
+                del self.__levels[level.price]
                 self.__bid_prices.pop()
                 if not self.__bid_prices:
                     break
-                best_bid = self.__bid_prices[-1]
+                level = self.__levels[self.__bid_prices[-1]]
 
     def trade_bid(self, now: float, order: Order) -> None:
         """Check to see if any existing ask orders match the specified bid order."""
-        best_ask = -self.__ask_prices[-1]
+        level = self.__levels[-self.__ask_prices[-1]]
 
-        while order.remaining_volume > 0 and best_ask <= order.price and self.__total_volumes[best_ask] > 0:
-            self.trade_level(now, order, best_ask)
-            if self.__total_volumes[best_ask] == 0:
-                del self.__levels[best_ask]
-                del self.__total_volumes[best_ask]
+        while order.remaining_volume > 0 and level.price <= order.price and level.total_volume > 0:
+            self.trade_level(now, order, level)
+            if level.total_volume == 0:
+                del self.__levels[level.price]
                 self.__ask_prices.pop()
                 if not self.__ask_prices:
                     break
-                best_ask = -self.__ask_prices[-1]
+                level = self.__levels[-self.__ask_prices[-1]]
 
-    def trade_level(self, now: float, order: Order, best_price: int) -> None:
+    def trade_level(self, now: float, order: Order, level: PriceLevel) -> None:
         """Match the specified order with existing orders at the given level."""
+        best_price: int = level.price
         remaining: int = order.remaining_volume
-        order_queue: Deque[Order] = self.__levels[best_price]
-        total_volume: int = self.__total_volumes[best_price]
+        total_volume: int = level.total_volume
 
         while remaining > 0 and total_volume > 0:
-            while order_queue[0].remaining_volume == 0:
-                order_queue.popleft()
-            passive: Order = order_queue[0]
+            passive: Order = level.first_order
             volume: int = remaining if remaining < passive.remaining_volume else passive.remaining_volume
             fee: int = round(best_price * volume * self.maker_fee)
             total_volume -= volume
             remaining -= volume
             passive.remaining_volume -= volume
             passive.total_fees += fee
+            if passive.remaining_volume == 0:
+                level.remove(passive)
             if passive.listener:
                 passive.listener.on_order_filled(now, passive, best_price, volume, fee)
 
-        self.__total_volumes[best_price] = total_volume
+        level.total_volume = total_volume
         traded_volume_at_this_level: int = order.remaining_volume - remaining
 
+        # Record the trade tick, keeping only the best TOP_LEVEL_COUNT prices
         if order.side == Side.BUY:
-            self.__ask_ticks[best_price] += traded_volume_at_this_level
+            prices = self.__ask_tick_prices
+            volumes = self.__ask_tick_volumes
+            for i in range(TOP_LEVEL_COUNT):
+                if prices[i] == best_price:
+                    volumes[i] += traded_volume_at_this_level
+                    break
+                if prices[i] == 0 or prices[i] > best_price:
+                    prices.insert(i, best_price)
+                    volumes.insert(i, traded_volume_at_this_level)
+                    prices.pop()
+                    volumes.pop()
+                    break
         else:
-            self.__bid_ticks[best_price] += traded_volume_at_this_level
+            prices = self.__bid_tick_prices
+            volumes = self.__bid_tick_volumes
+            for i in range(TOP_LEVEL_COUNT):
+                if prices[i] == best_price:
+                    volumes[i] += traded_volume_at_this_level
+                    break
+                if prices[i] < best_price:
+                    prices.insert(i, best_price)
+                    volumes.insert(i, traded_volume_at_this_level)
+                    prices.pop()
+                    volumes.pop()
+                    break
 
         fee: int = round(best_price * traded_volume_at_this_level * self.taker_fee)
         order.remaining_volume = remaining
@@ -274,25 +566,31 @@ class OrderBook(object):
             order.listener.on_order_filled(now, order, best_price, traded_volume_at_this_level, fee)
 
         self.__last_traded_price = best_price
-        for callback in self.trade_occurred:
-            callback(self)
+        self.version += 1
+        if self.__report is not None:
+            report: TradeReport = self.__report
+            report.fees += fee
+            report.last_price = best_price
+            report.levels += 1
+            report.value += best_price * traded_volume_at_this_level
+            report.volume += traded_volume_at_this_level
+        elif self.__defer_trades:
+            self.__trades_deferred = True
+        else:
+            for callback in self.trade_occurred:
+                callback(self)
 
     def trade_ticks(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
                     bid_volumes: List[int]) -> bool:
         """Return True and populate the lists if there have been trades."""
-        if self.__ask_ticks or self.__bid_ticks:
-            prices = sorted(self.__ask_ticks.keys())[:TOP_LEVEL_COUNT]
-            volumes = tuple(self.__ask_ticks[p] for p in prices)
-            ask_prices[:] = prices + [0] * (TOP_LEVEL_COUNT - len(prices))
-            ask_volumes[:] = volumes + (0,) * (TOP_LEVEL_COUNT - len(volumes))
-
-            prices = sorted(self.__bid_ticks.keys(), reverse=True)[:TOP_LEVEL_COUNT]
-            volumes = tuple(self.__bid_ticks[p] for p in prices)
-            bid_prices[:] = prices + [0] * (TOP_LEVEL_COUNT - len(prices))
-            bid_volumes[:] = volumes + (0,) * (TOP_LEVEL_COUNT - len(volumes))
+        if self.__ask_tick_prices[0] or self.__bid_tick_prices[0]:
+            ask_prices[:] = self.__ask_tick_prices
+            ask_volumes[:] = self.__ask_tick_volumes
+            bid_prices[:] = self.__bid_tick_prices
+            bid_volumes[:] = self.__bid_tick_volumes
 
-            self.__ask_ticks.clear()
-            self.__bid_ticks.clear()
+            self.__ask_tick_prices[:] = self.__ask_tick_volumes[:] = [0] * TOP_LEVEL_COUNT
+            self.__bid_tick_prices[:] = self.__bid_tick_volumes[:] = [0] * TOP_LEVEL_COUNT
 
             return True
 
@@ -309,7 +607,7 @@ class OrderBook(object):
             i = len(self.__bid_prices) - 1
             while total_volume < volume and i >= 0 and self.__bid_prices[i] and self.__bid_prices[i] >= limit_price:
                 price: int = self.__bid_prices[i]
-                available: int = self.__total_volumes[price]
+                available: int = self.__levels[price].total_volume
                 required: int = volume - total_volume
                 weight: int = required if required <= available else available
                 total_volume += weight
@@ -319,7 +617,7 @@ class OrderBook(object):
             i = len(self.__ask_prices) - 1
             while total_volume < volume and i >= 0 and -self.__ask_prices[i] and -self.__ask_prices[i] <= limit_price:
                 price: int = -self.__ask_prices[i]
-                available: int = self.__total_volumes[price]
+                available: int = self.__levels[price].total_volume
                 required: int = volume - total_volume
                 weight: int = required if required <= available else available
                 total_volume += weight
@@ -327,3 +625,307 @@ class OrderBook(object):
                 i -= 1
 
         return total_volume, total_value // total_volume if total_volume > 0 else 0
+
+
+class LadderOrderBook(OrderBook):
+    """An order book that keeps its price levels in a tick-indexed array.
+
+    Levels within a window of LADDER_SIZE ticks are stored in a list indexed
+    by price, so finding a level needs no search and adding or removing one
+    never shifts other entries. Slots keep their PriceLevel once created and
+    a level with no volume is treated as empty. The window recentres on the
+    touch when a new best price falls outside it. Levels outside the window,
+    or at prices that are not a multiple of the tick size, are kept in sorted
+    overflow lists.
+    """
+
+    def __init__(self, instrument: Instrument, maker_fee: float, taker_fee: float, tick_size: int,
+                 coalesce_trades: bool = False):
+        """Initialise a new instance of the LadderOrderBook class."""
+        super().__init__(instrument, maker_fee, taker_fee, coalesce_trades)
+
+        self.__base: int = 0
+        self.__best_ask_index: int = LADDER_SIZE
+        self.__best_bid_index: int = -1
+        self.__ask_count: int = 0
+        self.__bid_count: int = 0
+        self.__ladder: List[Optional[PriceLevel]] = [None] * LADDER_SIZE
+        self.__overflow: Dict[int, PriceLevel] = {}
+        self.__overflow_ask_prices: List[int] = []
+        self.__overflow_bid_prices: List[int] = []
+        self.__tick_size: int = tick_size
+
+    def __ask_levels(self) -> Iterator[PriceLevel]:
+        """Yield the ask levels from best to worst."""
+        overflow = self.__overflow_ask_prices
+        j = len(overflow) - 1
+        count = self.__ask_count
+        ladder = self.__ladder
+        i = self.__best_ask_index
+        while count:
+            level = ladder[i]
+            if level is not None and level.total_volume:
+                while j >= 0 and -overflow[j] < level.price:
+                    yield self.__overflow[-overflow[j]]
+                    j -= 1
+                yield level
+                count -= 1
+            i += 1
+        while j >= 0:
+            yield self.__overflow[-overflow[j]]
+            j -= 1
+
+    def __bid_levels(self) -> Iterator[PriceLevel]:
+        """Yield the bid levels from best to worst."""
+        overflow = self.__overflow_bid_prices
+        j = len(overflow) - 1
+        count = self.__bid_count
+        ladder = self.__ladder
+        i = self.__best_bid_index
+        while count:
+            level = ladder[i]
+            if level is not None and level.total_volume:
+                while j >= 0 and overflow[j] > level.price:
+                    yield self.__overflow[overflow[j]]
+                    j -= 1
+                yield level
+                count -= 1
+            i -= 1
+        while j >= 0:
+            yield self.__overflow[overflow[j]]
+            j -= 1
+
+    def __best_ask_level(self) -> Optional[PriceLevel]:
+        """Return the best ask level, or None if there are no ask orders."""
+        level = self.__ladder[self.__best_ask_index] if self.__ask_count else None
+        if self.__overflow_ask_prices:
+            price = -self.__overflow_ask_prices[-1]
+            if level is None or price < level.price:
+                return self.__overflow[price]
+        return level
+
+    def __best_bid_level(self) -> Optional[PriceLevel]:
+        """Return the best bid level, or None if there are no bid orders."""
+        level = self.__ladder[self.__best_bid_index] if self.__bid_count else None
+        if self.__overflow_bid_prices:
+            price = self.__overflow_bid_prices[-1]
+            if level is None or price > level.price:
+                return self.__overflow[price]
+        return level
+
+    def __add_level(self, level: PriceLevel, side: Side) -> None:
+        """Add a level to either the window or the overflow."""
+        offset = level.price - self.__base
+        index = offset // self.__tick_size
+        if 0 <= index < LADDER_SIZE and offset % self.__tick_size == 0:
+            self.__ladder[index] = level
+            self.__occupy(index, side)
+        else:
+            self.__overflow[level.price] = level
+            if side == Side.SELL:
+                insort_left(self.__overflow_ask_prices, -level.price)
+            else:
+                insort_left(self.__overflow_bid_prices, level.price)
+
+    def __occupy(self, index: int, side: Side) -> None:
+        """Record that the level at the given index now has volume."""
+        if side == Side.SELL:
+            self.__ask_count += 1
+            if index < self.__best_ask_index:
+                self.__best_ask_index = index
+        else:
+            self.__bid_count += 1
+            if index > self.__best_bid_index:
+                self.__best_bid_index = index
+
+    def __recentre(self, price: int) -> None:
+        """Move the window so that it is centred on the given price."""
+        best_bid = self.best_bid()
+        levels = [level for level in self.__ladder if level is not None and level.total_volume]
+        levels.extend(self.__overflow.values())
+
+        self.__base = price - (LADDER_SIZE // 2) * self.__tick_size
+        self.__best_ask_index = LADDER_SIZE
+        self.__best_bid_index = -1
+        self.__ask_count = self.__bid_count = 0
+        self.__ladder = [None] * LADDER_SIZE
+        self.__overflow.clear()
+        self.__overflow_ask_prices.clear()
+        self.__overflow_bid_prices.clear()
+
+        for level in levels:
+            self.__add_level(level, Side.BUY if best_bid is not None and level.price <= best_bid else Side.SELL)
+
+    def __remove_level(self, level: PriceLevel, side: Side) -> None:
+        """Remove the given level, which has no remaining volume, from this order book."""
+        price = level.price
+        offset = price - self.__base
+        index = offset // self.__tick_size
+        if 0 <= index < LADDER_SIZE and offset % self.__tick_size == 0:
+            ladder = self.__ladder
+            if side == Side.SELL:
+                self.__ask_count -= 1
+                if index == self.__best_ask_index:
+                    if self.__ask_count:
+                        index += 1
+                        while ladder[index] is None or not ladder[index].total_volume:
+                            index += 1
+                        self.__best_ask_index = index
+                    else:
+                        self.__best_ask_index = LADDER_SIZE
+            else:
+                self.__bid_count -= 1
+                if index == self.__best_bid_index:
+                    if self.__bid_count:
+                        index -= 1
+                        while ladder[index] is None or not ladder[index].total_volume:
+                            index -= 1
+                        self.__best_bid_index = index
+                    else:
+                        self.__best_bid_index = -1
+        else:
+            del self.__overflow[price]
+            if side == Side.SELL:
+                self.__overflow_ask_prices.pop(bisect(self.__overflow_ask_prices, -price) - 1)
+            else:
+                self.__overflow_bid_prices.pop(bisect(self.__overflow_bid_prices, price) - 1)
+
+    def best_ask(self) -> Optional[int]:
+        """Return the current best ask price, or None if there are no ask orders."""
+        if self.__overflow_ask_prices:
+            level = self.__best_ask_level()
+            return level.price if level is not None else None
+        return self.__ladder[self.__best_ask_index].price if self.__ask_count else None
+
+    def best_bid(self) -> Optional[int]:
+        """Return the current best bid price, or None if there are no bid orders."""
+        if self.__overflow_bid_prices:
+            level = self.__best_bid_level()
+            return level.price if level is not None else None
+        return self.__ladder[self.__best_bid_index].price if self.__bid_count else None
+
+    def place(self, now: float, order: Order) -> None:
+        """Place an order that does not match any existing order in this order book."""
+        price = order.price
+        offset = price - self.__base
+        index = offset // self.__tick_size
+
+        if 0 <= index < LADDER_SIZE and offset % self.__tick_size == 0:
+            level = self.__ladder[index]
+            if level is None:
+                level = self.__ladder[index] = PriceLevel(price)
+            if level.total_volume == 0:
+                self.__occupy(index, order.side)
+        else:
+            level = self.__overflow.get(price)
+            if level is None:
+                level = PriceLevel(price)
+                if offset % self.__tick_size == 0:
+                    # Recentre if this order would become the new best price
+                    best = self.best_ask() if order.side == Side.SELL else self.best_bid()
+                    if best is None or (price < best if order.side == Side.SELL else price > best):
+                        self.__recentre(price)
+                self.__add_level(level, order.side)
+
+        level.append(order)
+        level.total_volume += order.remaining_volume
+
+        if order.listener:
+            order.listener.on_order_placed(now, order)
+
+    def remove_volume_from_level(self, price: int, volume: int, side: Side) -> None:
+        offset = price - self.__base
+        index = offset // self.__tick_size
+        if 0 <= index < LADDER_SIZE and offset % self.__tick_size == 0:
+            level = self.__ladder[index]
+        else:
+            level = self.__overflow[price]
+        level.total_volume -= volume
+        if level.total_volume == 0:
+            self.__remove_level(level, side)
+
+    def _collect_top_levels(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                            bid_volumes: List[int]) -> None:
+        """Populate the supplied lists with the top levels held in this book."""
+        i = 0
+        for level in self.__ask_levels():
+            ask_prices[i] = level.price
+            ask_volumes[i] = level.total_volume
+            i += 1
+            if i == TOP_LEVEL_COUNT:
+                break
+        while i < TOP_LEVEL_COUNT:
+            ask_prices[i] = ask_volumes[i] = 0
+            i += 1
+
+        i = 0
+        for level in self.__bid_levels():
+            bid_prices[i] = level.price
+            bid_volumes[i] = level.total_volume
+            i += 1
+            if i == TOP_LEVEL_COUNT:
+                break
+        while i < TOP_LEVEL_COUNT:
+            bid_prices[i] = bid_volumes[i] = 0
+            i += 1
+
+    def _levels(self, side: Side) -> Iterator[PriceLevel]:
+        """Yield the levels on the given side of this book from best to worst."""
+        return self.__ask_levels() if side == Side.SELL else self.__bid_levels()
+
+    def trade_ask(self, now: float, order: Order) -> None:
+        """Check to see if any existing bid orders match the specified ask order."""
+        level = self.__best_bid_level()
+
+        while order.remaining_volume > 0 and level is not None and level.price >= order.price:
+            self.trade_level(now, order, level)
+            if level.total_volume == 0:
+                self.__remove_level(level, Side.BUY)
+                level = self.__best_bid_level()
+
+    def trade_bid(self, now: float, order: Order) -> None:
+        """Check to see if any existing ask orders match the specified bid order."""
+        level = self.__best_ask_level()
+
+        while order.remaining_volume > 0 and level is not None and level.price <= order.price:
+            self.trade_level(now, order, level)
+            if level.total_volume == 0:
+                self.__remove_level(level, Side.SELL)
+                level = self.__best_ask_level()
+
+    def try_trade(self, side: Side, limit_price: int, volume: int) -> Tuple[int, int]:
+        """Return the volume that would trade and the average price per lot for
+        the requested trade without changing the order book.
+        """
+        total_volume: int = 0
+        total_value: int = 0
+
+        for level in (self.__bid_levels() if side == Side.ASK else self.__ask_levels()):
+            price: int = level.price
+            if total_volume >= volume or (price < limit_price if side == Side.ASK else price > limit_price):
+                break
+            available: int = level.total_volume
+            required: int = volume - total_volume
+            weight: int = required if required <= available else available
+            total_volume += weight
+            total_value += weight * price
+
+        return total_volume, total_value // total_volume if total_volume > 0 else 0
+
+
+class OrderBookFactory:
+    """A factory class for OrderBook instances."""
+
+    def __init__(self, typ: str, tick_size: float, coalesce_trades: bool = False):
+        """Initialise a new instance of the OrderBookFactory class."""
+        if typ not in ("sorted", "ladder"):
+            raise ValueError("type must be either 'sorted' or 'ladder'")
+        self.coalesce_trades: bool = coalesce_trades
+        self.typ: str = typ
+        self.tick_size: int = int(tick_size * 100.0)  # convert tick size to cents
+
+    def create(self, instrument: Instrument, maker_fee: float, taker_fee: float) -> OrderBook:
+        """Return a new OrderBook instance."""
+        if self.typ == "ladder":
+            return LadderOrderBook(instrument, maker_fee, taker_fee, self.tick_size, self.coalesce_trades)
+        return OrderBook(instrument, maker_fee, taker_fee, self.coalesce_trades)
@@ -18,10 +18,12 @@
 import asyncio
 import csv
 import logging
+import os
 import queue
 import threading
+import time
 
-from typing import Callable, List, Optional, TextIO
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
 
 from .account import CompetitorAccount
 
@@ -63,16 +65,59 @@ class ScoreRecord:
                      self.status))
 
 
+class TeamStatistics:
+    """Running statistics for a team that are written to the statistics file at the end of a match."""
+    __slots__ = ("account", "breach_time", "last_fields", "last_time", "ticks")
+
+    def __init__(self, account: CompetitorAccount, now: float):
+        """Initialise a new instance of the TeamStatistics class."""
+        self.account: CompetitorAccount = account
+        self.breach_time: float = 0.0
+        self.last_fields: Optional[Tuple] = None
+        self.last_time: float = now
+        self.ticks: int = 0
+
+    def __iter__(self):
+        account = self.account
+        return iter((account.profit_or_loss,
+                     account.max_profit,
+                     account.max_drawdown,
+                     account.turnover,
+                     account.total_fees,
+                     round(self.breach_time, 6)))
+
+
 class ScoreBoardWriter:
     """A processor of score records that it writes to a file."""
 
-    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop):
-        """Initialise a new instance of the MatchEvents class."""
+    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, buffer_size: int = 1 << 20,
+                 flush_interval: float = 1.0, keyframe_interval: Optional[int] = None):
+        """Initialise a new instance of the MatchEvents class.
+
+        Score records are collected into batches which are passed to the
+        writer thread by the flush method. The writer thread writes each
+        batch in one go and flushes the file whenever it has nothing to do
+        for flush_interval seconds.
+
+        If a keyframe interval is given, a team's tick record is only
+        written if the team's volumes, positions, fees, balance, profit or
+        status have changed since its last tick record, or on every
+        keyframe_interval'th tick.
+        Either way, running statistics for each team are written to a
+        statistics file (for example, "score_board_statistics.csv") when
+        the match ends.
+        """
+        self.batch: List[ScoreRecord] = list()
+        self.buffer_size: int = buffer_size
         self.event_loop: asyncio.AbstractEventLoop = loop
         self.filename: str = filename
         self.finished: bool = False
+        self.flush_interval: float = flush_interval
+        self.keyframe_interval: Optional[int] = keyframe_interval
         self.logger = logging.getLogger("SCORE_BOARD")
         self.queue: queue.Queue = queue.Queue()
+        self.statistics: Dict[str, TeamStatistics] = dict()
+        self.statistics_filename: str = "%s_statistics%s" % os.path.splitext(filename)
         self.writer_task: Optional[threading.Thread] = None
 
         self.task_complete: List[Callable] = list()
@@ -86,7 +131,7 @@ class ScoreBoardWriter:
     def breach(self, now: float, name: str, account: CompetitorAccount, etf_price: Optional[int],
                future_price: Optional[int]) -> None:
         """Create a new disconnect event."""
-        self.queue.put(
+        self.batch.append(
             ScoreRecord(now, name, "Breach", account.buy_volume, account.sell_volume, account.etf_position,
                         account.future_position, etf_price, future_price, account.total_fees, account.account_balance,
                         account.profit_or_loss))
@@ -95,16 +140,25 @@ class ScoreBoardWriter:
                    future_price: Optional[int]) -> None:
         """Create a new disconnect event."""
         if not self.finished:
-            self.queue.put(
+            self.batch.append(
                 ScoreRecord(now, name, "Disconnect", account.buy_volume, account.sell_volume, account.etf_position,
                             account.future_position, etf_price, future_price, account.total_fees,
                             account.account_balance, account.profit_or_loss))
 
     def finish(self) -> None:
         """Indicate the the series of events is complete."""
+        if not self.finished:
+            self.write_statistics()
+        self.flush()
         self.queue.put(None)
         self.finished = True
 
+    def flush(self) -> None:
+        """Pass the score records collected since the last flush to the writer thread."""
+        if self.batch:
+            self.queue.put(self.batch.copy())
+            self.batch.clear()
+
     def on_writer_done(self, num_events: int) -> None:
         """Called when the match event writer thread is done."""
         for c in self.task_complete:
@@ -114,7 +168,7 @@ class ScoreBoardWriter:
     def start(self):
         """Start the score board writer thread"""
         try:
-            score_board = open(self.filename, "w", newline="")
+            score_board = open(self.filename, "w", buffering=self.buffer_size, newline="")
         except IOError as e:
             self.logger.error("failed to open score board file: filename=%s", self.filename, exc_info=e)
             raise
@@ -126,7 +180,24 @@ class ScoreBoardWriter:
     def tick(self, now: float, name: str, account: CompetitorAccount, etf_price: Optional[int],
              future_price: Optional[int], status: Optional[str] = None) -> None:
         """Create a new tick event"""
-        self.queue.put(
+        statistics = self.statistics.get(name)
+        if statistics is None:
+            statistics = self.statistics[name] = TeamStatistics(account, now)
+        if status == "BREACH":
+            statistics.breach_time += now - statistics.last_time
+        statistics.last_time = now
+
+        if self.keyframe_interval:
+            # Market prices change on most ticks, so only the team's own fields are compared
+            fields = (account.buy_volume, account.sell_volume, account.etf_position, account.future_position,
+                      account.total_fees, account.account_balance, account.profit_or_loss, status)
+            keyframe = statistics.ticks % self.keyframe_interval == 0
+            statistics.ticks += 1
+            if fields == statistics.last_fields and not keyframe:
+                return
+            statistics.last_fields = fields
+
+        self.batch.append(
             ScoreRecord(now, name, "Tick", account.buy_volume, account.sell_volume, account.etf_position,
                         account.future_position, etf_price, future_price, account.total_fees, account.account_balance,
                         account.profit_or_loss, status))
@@ -143,11 +214,28 @@ class ScoreBoardWriter:
                                      "EtfPrice,FuturePrice,TotalFees,AccountBalance,ProfitOrLoss,"
                                      "Status").split(','))
 
-                evt = fifo.get()
-                while evt is not None:
-                    count += 1
-                    csv_writer.writerow(evt)
-                    evt = fifo.get()
+                next_flush = time.monotonic() + self.flush_interval
+                batch: Optional[List[ScoreRecord]] = fifo.get()
+                while batch is not None:
+                    count += len(batch)
+                    csv_writer.writerows(batch)
+                    try:
+                        batch = fifo.get(timeout=max(next_flush - time.monotonic(), 0.0))
+                    except queue.Empty:
+                        score_records_file.flush()
+                        next_flush = time.monotonic() + self.flush_interval
+                        batch = fifo.get()
         finally:
             if not self.event_loop.is_closed():
                 self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
+
+    def write_statistics(self) -> None:
+        """Write the running statistics for each team to the statistics file."""
+        try:
+            with open(self.statistics_filename, "w", newline="") as statistics_file:
+                csv_writer = csv.writer(statistics_file)
+                csv_writer.writerow(("Team,ProfitOrLoss,MaxProfit,MaxDrawdown,Turnover,TotalFees,"
+                                     "BreachTime").split(','))
+                csv_writer.writerows((name, *statistics) for name, statistics in sorted(self.statistics.items()))
+        except IOError as e:
+            self.logger.error("failed to write statistics file: filename=%s", self.statistics_filename, exc_info=e)
@@ -0,0 +1,154 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+import math
+import random
+
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .market_events import MarketEvent
+from .types import Instrument, Lifespan, MarketEventOperation, Side
+
+ORDERS_PER_LEVEL = 3  # Typical number of resting orders at each price level
+
+
+class SyntheticMarketData(object):
+    """A generator of random market data for load testing.
+
+    Events arrive at random (as a Poisson process) and each one is an insert,
+    amend or cancel in the given proportions for the future or the ETF. The
+    fair price of the future follows a random walk and the fair price of the
+    ETF tracks it with mean-reverting noise. Most inserts are good-for-day
+    orders placed up to depth ticks behind the fair price, while the rest
+    cross it and are mostly fill-and-kill orders. When a book holds more
+    than its share of orders, inserts become cancels of the order furthest
+    from the fair price (of two chosen at random), and when it is empty
+    amends and cancels become inserts. Amends and cancels may refer to
+    orders that have already traded, which the simulator ignores.
+
+    Prices are in cents and the same seed always gives the same events.
+    """
+
+    def __init__(self, events_per_second: float, duration: float, depth: int = 10, seed: Optional[int] = None,
+                 mix: Tuple[float, float, float] = (0.5, 0.1, 0.4), start_price: int = 15000, tick_size: int = 100,
+                 volatility: float = 0.2, etf_noise: float = 1.0, aggressive_fraction: float = 0.05):
+        """Initialise a new instance of the SyntheticMarketData class.
+
+        The mix gives the proportions of inserts, amends and cancels, the
+        volatility is the standard deviation in ticks of the future's fair
+        price after one second and the ETF noise is the long-run standard
+        deviation in ticks of the ETF's fair price from the future's.
+
+        Raises ValueError if the number of events per second is not finite or
+        if it, the duration or the depth is not greater than zero.
+        """
+        if not 0.0 < events_per_second < math.inf:
+            raise ValueError("events per second must be finite and greater than zero")
+        if not duration > 0.0:
+            raise ValueError("duration must be greater than zero")
+        if depth <= 0:
+            raise ValueError("depth must be greater than zero")
+
+        self.aggressive_fraction: float = aggressive_fraction
+        self.depth: int = depth
+        self.duration: float = duration
+        self.etf_noise: float = etf_noise
+        self.events_per_second: float = events_per_second
+        self.mix: Tuple[float, float, float] = mix
+        self.seed: Optional[int] = seed
+        self.start_price: int = start_price
+        self.tick_size: int = tick_size
+        self.volatility: float = volatility
+
+    def __iter__(self) -> Iterator[MarketEvent]:
+        """Yield the market events in time order."""
+        rng = random.Random(self.seed)
+        expovariate, gauss, rand, randint = rng.expovariate, rng.gauss, rng.random, rng.randint
+
+        total = sum(self.mix)
+        insert_limit = self.mix[0] / total
+        amend_limit = (self.mix[0] + self.mix[1]) / total
+        tick_size = self.tick_size
+        depth = self.depth
+        target_orders = 2 * depth * ORDERS_PER_LEVEL
+        mean_distance = max(depth / 3.0, 0.5)
+        etf_reversion = 1.0  # Per second
+
+        live: Tuple[List[List[int]], List[List[int]]] = (list(), list())  # Order id, side, price, volume
+        future_price = float(self.start_price)
+        etf_offset = 0.0
+        order_id = 0
+        now = 0.0
+
+        while True:
+            dt = expovariate(self.events_per_second)
+            now += dt
+            if now >= self.duration:
+                return
+
+            future_price += gauss(0.0, self.volatility * tick_size * math.sqrt(dt))
+            decay = math.exp(-etf_reversion * dt)
+            etf_offset = etf_offset * decay + gauss(0.0, self.etf_noise * tick_size * math.sqrt(1.0 - decay * decay))
+
+            instrument = Instrument.FUTURE if rand() < 0.5 else Instrument.ETF
+            fair_price = future_price if instrument == Instrument.FUTURE else future_price + etf_offset
+            orders = live[instrument]
+            time = round(now, 6)
+
+            choice = rand()
+            if not orders or (choice < insert_limit and len(orders) < target_orders):
+                order_id += 1
+                side = Side.SELL if rand() < 0.5 else Side.BUY
+                if rand() < self.aggressive_fraction:
+                    ticks = -randint(1, 2)
+                    lifespan = Lifespan.FILL_AND_KILL if rand() < 0.8 else Lifespan.GOOD_FOR_DAY
+                    volume = randint(1, 20)
+                else:
+                    ticks = min(int(expovariate(1.0 / mean_distance)), depth - 1)
+                    lifespan = Lifespan.GOOD_FOR_DAY
+                    volume = randint(1, 100)
+                if side == Side.SELL:
+                    price = (math.ceil(fair_price / tick_size) + ticks) * tick_size
+                else:
+                    price = (math.floor(fair_price / tick_size) - ticks) * tick_size
+                price = max(price, tick_size)
+                if lifespan == Lifespan.GOOD_FOR_DAY:
+                    orders.append([order_id, side, price, volume])
+                yield MarketEvent(time, instrument, MarketEventOperation.INSERT, order_id, side, volume, price,
+                                  lifespan)
+            elif insert_limit <= choice < amend_limit:
+                order = orders[randint(0, len(orders) - 1)]
+                if order[3] > 1:
+                    diff = randint(1, order[3] - 1)
+                    order[3] -= diff
+                    yield MarketEvent(time, instrument, MarketEventOperation.AMEND, order[0], None, -diff, 0, None)
+                else:
+                    yield self.__cancel(time, instrument, orders, fair_price, randint)
+            else:
+                yield self.__cancel(time, instrument, orders, fair_price, randint)
+
+    def __cancel(self, time: float, instrument: Instrument, orders: List[List[int]], fair_price: float,
+                 randint: Callable[[int, int], int]) -> MarketEvent:
+        """Remove the order furthest from the fair price of two at random and return its cancel event."""
+        i = randint(0, len(orders) - 1)
+        j = randint(0, len(orders) - 1)
+        if abs(orders[j][2] - fair_price) > abs(orders[i][2] - fair_price):
+            i = j
+        order = orders[i]
+        orders[i] = orders[-1]
+        orders.pop()
+        return MarketEvent(time, instrument, MarketEventOperation.CANCEL, order[0], None, 0, 0, None)
@@ -16,25 +16,163 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 import asyncio
+import heapq
+import itertools
 import logging
 import time
 import random
 
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class VirtualTimerHandle:
+    """A callback scheduled with a virtual clock."""
+    __slots__ = ("args", "callback", "cancelled", "when")
+
+    def __init__(self, when: float, callback: Callable[..., Any], args: Tuple[Any, ...]):
+        """Initialise a new instance of the VirtualTimerHandle class."""
+        self.args: Tuple[Any, ...] = args
+        self.callback: Callable[..., Any] = callback
+        self.cancelled: bool = False
+        self.when: float = when
+
+    def cancel(self) -> None:
+        """Cancel the callback."""
+        self.cancelled = True
+
+
+class VirtualClock:
+    """A clock that runs a match as fast as possible.
+
+    Rather than waiting for real time to pass, the clock jumps straight to the
+    time of the next scheduled callback. After a callback that leads to
+    activity (messages sent to or received from a connected auto-trader) the
+    clock waits until there has been no activity for the quiet period before
+    moving on, so the auto-traders get a chance to respond at the current
+    time. An auto-trader that takes longer than the quiet period to respond
+    sees its messages arrive at a later virtual time. When no auto-traders
+    are connected, activity is ignored and the clock never waits.
+    """
+
+    def __init__(self, quiet_period: float):
+        """Initialise a new instance of the VirtualClock class."""
+        self.__activity: int = 0
+        self.__connections: int = 0
+        self.__handles: List[Tuple[float, int, VirtualTimerHandle]] = list()
+        self.__logger: logging.Logger = logging.getLogger("TIMER")
+        self.__quiet_period: float = quiet_period
+        self.__running: bool = False
+        self.__sequence: Iterator[int] = itertools.count()
+
+        self.now: float = 0.0
+
+    def call_at(self, when: float, callback: Callable[..., Any], *args: Any) -> VirtualTimerHandle:
+        """Schedule a callback to be called at the given virtual time."""
+        handle = VirtualTimerHandle(when, callback, args)
+        heapq.heappush(self.__handles, (when, next(self.__sequence), handle))
+        return handle
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> VirtualTimerHandle:
+        """Schedule a callback to be called after the given virtual delay."""
+        return self.call_at(self.now + delay, callback, *args)
+
+    def note_activity(self) -> None:
+        """Note that data has been sent to or received from the auto-traders at the current time."""
+        if self.__connections:
+            self.__activity += 1
+
+    def on_connection_lost(self) -> None:
+        """Called when an auto-trader disconnects."""
+        self.__connections -= 1
+
+    def on_connection_made(self) -> None:
+        """Called when an auto-trader connects."""
+        self.__connections += 1
+
+    async def run(self) -> None:
+        """Call scheduled callbacks in time order until stopped."""
+        self.__logger.info("running in virtual time: quiet_period=%.6f", self.__quiet_period)
+        self.__running = True
+        while self.__running and self.__handles:
+            when, _, handle = heapq.heappop(self.__handles)
+            if handle.cancelled:
+                continue
+
+            self.now = when
+            activity = self.__activity
+            handle.callback(*handle.args)
+
+            # Let the event loop process anything that is ready (such as messages waiting to be sent)
+            await asyncio.sleep(0)
+            while activity != self.__activity:
+                activity = self.__activity
+                await asyncio.sleep(self.__quiet_period)
+
+    def stop(self) -> None:
+        """Stop calling scheduled callbacks."""
+        self.__running = False
+
+
+class TimerMetrics:
+    """Measurements of how closely a timer keeps to its schedule.
+
+    Drift is the time (in match seconds) between when a tick was due and
+    when it happened. Only running totals are kept, so the metrics use the
+    same memory however long the match runs. Ticks in virtual time always
+    happen when they are due.
+    """
+
+    def __init__(self):
+        """Initialise a new instance of the TimerMetrics class."""
+        self.late_ticks: int = 0  # Number of ticks that happened after the next tick was due
+        self.max_drift: float = 0.0
+        self.max_skipped_ticks: int = 0
+        self.skipped_ticks: int = 0
+        self.ticks: int = 0
+        self.total_drift: float = 0.0
+
+    def mean_drift(self) -> float:
+        """Return the mean drift of the ticks so far."""
+        return self.total_drift / self.ticks if self.ticks else 0.0
+
+    def record(self, due: float, now: float, skipped_ticks: int) -> None:
+        """Record a tick."""
+        drift = now - due
+        self.ticks += 1
+        self.total_drift += drift
+        if drift > self.max_drift:
+            self.max_drift = drift
+        if skipped_ticks:
+            self.late_ticks += 1
+            self.skipped_ticks += skipped_ticks
+            if skipped_ticks > self.max_skipped_ticks:
+                self.max_skipped_ticks = skipped_ticks
 
 
 class Timer:
-    """A timer."""
+    """A timer.
+
+    Each tick is randomly jittered by up to 20% of the tick interval using
+    the timer's own random number generator. Tick n always gets the n'th
+    random number, even if ticks are skipped, so timers with the same seed
+    have the same schedule. If a virtual clock is given, the timer ticks in
+    virtual time without any jitter and the speed is ignored.
+    """
 
-    def __init__(self, tick_interval: float, speed: float):
+    def __init__(self, tick_interval: float, speed: float, clock: Optional[VirtualClock] = None,
+                 seed: Optional[int] = None):
         """Initialise a new instance of the timer class."""
+        self.__clock: Optional[VirtualClock] = clock
         self.__event_loop: Optional[asyncio.AbstractEventLoop] = None
         self.__logger: logging.Logger = logging.getLogger("TIMER")
+        self.__random: random.Random = random.Random(seed)
         self.__speed: float = speed
         self.__start_time: float = 0.0
-        self.__tick_timer_handle: Optional[asyncio.TimerHandle] = None
+        self.__tick_timer_handle: Optional[Union[asyncio.TimerHandle, VirtualTimerHandle]] = None
         self.__tick_interval: float = tick_interval
 
+        self.metrics: TimerMetrics = TimerMetrics()
+
         # Signals
         self.timer_started: List[Callable[[Any, float], None]] = list()
         self.timer_stopped: List[Callable[[Any, float], None]] = list()
@@ -43,20 +181,35 @@ class Timer:
     def advance(self) -> float:
         """Advance the timer."""
         if self.__start_time:
+            if self.__clock is not None:
+                return self.__clock.now
             now = (time.monotonic() - self.__start_time) * self.__speed
             return now
         return 0.0
 
-    def __on_timer_tick(self, tick_time: float, tick_number: int):
+    def __on_virtual_timer_tick(self, tick_time: float, tick_number: int):
+        """Called on each timer tick when running in virtual time."""
+        self.metrics.record(tick_time, tick_time, 0)
+        for callback in self.timer_ticked:
+            callback(self, tick_time, tick_number)
+
+        self.__tick_timer_handle = self.__clock.call_at(tick_time + self.__tick_interval, self.__on_virtual_timer_tick,
+                                                        tick_time + self.__tick_interval, tick_number + 1)
+
+    def __on_timer_tick(self, tick_time: float, tick_number: int, due: float):
         """Called on each timer tick."""
         now = (time.monotonic() - self.__start_time) * self.__speed
 
         # There may have been a delay, so work out which tick this really is
         # We also need to prevent "skipping" ticks backwards due to negative random jitter
-        skipped_ticks: float = max(0, (now - tick_time) // self.__tick_interval)
+        skipped_ticks: int = int(max(0, (now - tick_time) // self.__tick_interval))
+        self.metrics.record(due, now, skipped_ticks)
         if skipped_ticks:
             tick_time += self.__tick_interval * skipped_ticks
-            tick_number += int(skipped_ticks)
+            tick_number += skipped_ticks
+            # Discard the random numbers for the skipped ticks to keep the schedule
+            for _ in range(skipped_ticks):
+                self.__random.random()
 
         for callback in self.timer_ticked:
             callback(self, now, tick_number)
@@ -65,10 +218,11 @@ class Timer:
 
         # Generate random jitter, which can be +/- 20% of standard tick interval
         limit = self.__tick_interval * 0.2
-        jitter = random.uniform(-limit, +limit) / self.__speed
+        jitter = self.__random.uniform(-limit, +limit) / self.__speed
 
         self.__tick_timer_handle = self.__event_loop.call_at(self.__start_time + jitter + tick_time/self.__speed,
-                                                             self.__on_timer_tick, tick_time, tick_number + 1)
+                                                             self.__on_timer_tick, tick_time, tick_number + 1,
+                                                             tick_time + jitter * self.__speed)
 
     def start(self) -> None:
         """Start this timer."""
@@ -76,12 +230,66 @@ class Timer:
         self.__start_time = time.monotonic()
         for callback in self.timer_started:
             callback(self, self.__start_time)
-        self.__on_timer_tick(0.0, 1)
+        if self.__clock is not None:
+            self.__tick_timer_handle = self.__clock.call_at(self.__clock.now, self.__on_virtual_timer_tick,
+                                                            self.__clock.now, 1)
+        else:
+            self.__on_timer_tick(0.0, 1, 0.0)
 
     def shutdown(self, now: float, reason: str) -> None:
         """Shut down this timer."""
         self.__logger.info("shutting down the match: time=%.6f reason='%s'", now, reason)
+        self.__logger.info("timer metrics: tick_interval=%.3f ticks=%d late_ticks=%d skipped_ticks=%d"
+                           " max_skipped_ticks=%d mean_drift=%.6f max_drift=%.6f", self.__tick_interval,
+                           self.metrics.ticks, self.metrics.late_ticks, self.metrics.skipped_ticks,
+                           self.metrics.max_skipped_ticks, self.metrics.mean_drift(), self.metrics.max_drift)
         if self.__tick_timer_handle:
             self.__tick_timer_handle.cancel()
         for callback in self.timer_stopped:
             callback(self, now)
+
+
+class TimingWheel:
+    """Call callbacks a fixed number of ticks after they are scheduled.
+
+    The wheel has one slot for each tick up to the delay and each slot holds
+    the callbacks due on that tick, so scheduling and cancelling a callback
+    take constant time and the callbacks due on a tick are called together.
+    If ticks are skipped, the callbacks due on the skipped ticks are called
+    on the next tick.
+    """
+
+    def __init__(self, timer: Timer, delay: int):
+        """Initialise a new instance of the TimingWheel class."""
+        self.delay: int = delay
+        self.tick_number: int = 0
+
+        self.__slots: List[Dict[Any, Callable[[], Any]]] = [dict() for _ in range(delay + 1)]
+
+        timer.timer_ticked.append(self.on_timer_tick)
+
+    def cancel(self, key: Any, slot: int) -> None:
+        """Cancel the callback scheduled for the given key in the given slot."""
+        self.__slots[slot].pop(key, None)
+
+    def on_timer_tick(self, timer: Timer, now: float, tick_number: int) -> None:
+        """Called on each timer tick."""
+        slots = self.__slots
+        first = max(self.tick_number + 1, tick_number - len(slots) + 1)
+        self.tick_number = tick_number
+        for n in range(first, tick_number + 1):
+            slot = n % len(slots)
+            if slots[slot]:
+                callbacks = slots[slot]
+                slots[slot] = dict()
+                for callback in callbacks.values():
+                    callback()
+
+    def schedule(self, key: Any, callback: Callable[[], Any]) -> int:
+        """Schedule the callback for the given key and return its slot.
+
+        A key can only have one callback in a slot at a time.
+        """
+        slot = (self.tick_number + self.delay) % len(self.__slots)
+        self.__slots[slot][key] = callback
+        return slot
@@ -17,6 +17,8 @@
 #     <https://www.gnu.org/licenses/>.
 import enum
 
+from typing import Dict
+
 
 class Instrument(enum.IntEnum):
     FUTURE = 0
@@ -32,6 +34,15 @@ class Side(enum.IntEnum):
     B = BUY
 
 
+class MarketEventOperation(enum.IntEnum):
+    AMEND = 0
+    CANCEL = 1
+    INSERT = 2
+    Amend = AMEND
+    Cancel = CANCEL
+    Insert = INSERT
+
+
 class Lifespan(enum.IntEnum):
     FILL_AND_KILL = 0  # Fill and kill orders trade immediately if possible, otherwise they are cancelled
     GOOD_FOR_DAY = 1  # Good for day orders remain in the market until they trade or are explicitly cancelled
@@ -43,6 +54,12 @@ class Lifespan(enum.IntEnum):
     G = GOOD_FOR_DAY
 
 
+# Maps from the integer values of instruments, lifespans and sides (as held in binary files) to the enum members
+INSTRUMENTS_BY_VALUE: Dict[int, Instrument] = {instrument.value: instrument for instrument in Instrument}
+LIFESPANS_BY_VALUE: Dict[int, Lifespan] = {lifespan.value: lifespan for lifespan in Lifespan}
+SIDES_BY_VALUE: Dict[int, Side] = {side.value: side for side in Side}
+
+
 class ICompetitor:
     def disconnect(self, now: float) -> None:
         """Disconnect this competitor."""
@@ -1,6 +1,8 @@
-import asyncio
+import math
 
-from typing import Any, Callable, Optional
+from typing import Any, Callable
+
+from .timer import Timer, TimingWheel
 
 MAX_UNHEDGED_LOTS: int = 10
 UNHEDGED_LOTS_TIME_LIMIT: int = 60
@@ -9,11 +11,12 @@ UNHEDGED_LOTS_TIME_LIMIT: int = 60
 class UnhedgedLots:
     """Keep track of unhedged lots and call a callback if unhedged lots are held for too long."""
 
-    def __init__(self, callback: Callable[[], Any]):
+    def __init__(self, callback: Callable[[], Any], wheel: TimingWheel):
         """Initialise a new instance of the UnhedgedLots class."""
         self.callback: Callable[[], None] = callback
         self.relative_position: int = 0
-        self.timer_handle: Optional[asyncio.TimerHandle] = None
+        self.slot: int = 0
+        self.wheel: TimingWheel = wheel
 
     @property
     def unhedged_lot_count(self) -> int:
@@ -30,16 +33,16 @@ class UnhedgedLots:
 
         if delta > 0:
             if self.relative_position < -MAX_UNHEDGED_LOTS <= new_relative_position:
-                self.timer_handle.cancel()
+                self.wheel.cancel(self, self.slot)
 
             if new_relative_position > MAX_UNHEDGED_LOTS >= self.relative_position:
-                self.timer_handle = asyncio.get_running_loop().call_later(UNHEDGED_LOTS_TIME_LIMIT, self.callback)
+                self.slot = self.wheel.schedule(self, self.callback)
         elif delta < 0:
             if self.relative_position > MAX_UNHEDGED_LOTS >= new_relative_position:
-                self.timer_handle.cancel()
+                self.wheel.cancel(self, self.slot)
 
             if new_relative_position < -MAX_UNHEDGED_LOTS <= self.relative_position:
-                self.timer_handle = asyncio.get_running_loop().call_later(UNHEDGED_LOTS_TIME_LIMIT, self.callback)
+                self.slot = self.wheel.schedule(self, self.callback)
 
         self.relative_position = new_relative_position
 
@@ -47,9 +50,16 @@ class UnhedgedLots:
 class UnhedgedLotsFactory:
     """A factory class for UnhedgedLots instances."""
 
-    def __init__(self):
-        """Initialise a new instance of the UnhedgedLotsFactory class."""
+    def __init__(self, timer: Timer, tick_interval: float, speed: float):
+        """Initialise a new instance of the UnhedgedLotsFactory class.
+
+        The time limit is measured with a timing wheel driven by the given
+        tick timer. It is rounded up to a whole number of ticks and one more
+        tick is added for the part of a tick that has passed when unhedged
+        lots are first held.
+        """
+        self.wheel: TimingWheel = TimingWheel(timer, math.ceil(UNHEDGED_LOTS_TIME_LIMIT * speed / tick_interval) + 1)
 
     def create(self, callback: Callable[[], Any]) -> UnhedgedLots:
         """Return a new instance of the UnhedgedLots class."""
-        return UnhedgedLots(callback)
+        return UnhedgedLots(callback, self.wheel)
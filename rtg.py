@@ -16,28 +16,161 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 import argparse
+import io
+import math
 import multiprocessing
 import pathlib
+import shutil
 import subprocess
 import sys
+import tempfile
 import time
 import traceback
 
+from typing import List, Tuple
+
 import ready_trader_go.exchange
 import ready_trader_go.trader
 
+from ready_trader_go.market_events import (BINARY_MARKET_DATA_SUFFIX, COMPRESSED_MARKET_DATA_OPENERS,
+                                           MARKET_DATA_READ_BUFFER_SIZE, array_market_event_chunks,
+                                           binary_market_data_filename, convert_market_data, csv_market_event_chunks,
+                                           open_market_data, read_csv_market_data_arrays, write_binary_market_data,
+                                           write_csv_market_data)
+from ready_trader_go.match_events import convert_match_events, is_match_events_journal
+from ready_trader_go.synthetic_market_data import SyntheticMarketData
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 try:
     from ready_trader_go.hud.__main__ import main as hud_main, replay as hud_replay
 except ImportError:
     hud_main = hud_replay = None
 
 
+def benchmark(args) -> None:
+    """Measure how quickly market data files can be decompressed and parsed."""
+    paths = args.filename or market_data_paths()
+    if not paths:
+        print("no market data files to benchmark", file=sys.stderr)
+        return
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        if args.compress:
+            for path in list(paths):
+                if path.suffix.lower() not in COMPRESSED_MARKET_DATA_OPENERS:
+                    for suffix, opener in sorted(COMPRESSED_MARKET_DATA_OPENERS.items()):
+                        compressed = pathlib.Path(temporary_directory, path.name + suffix)
+                        with open(path, "rb") as source, opener(str(compressed), "wb") as destination:
+                            shutil.copyfileobj(source, destination, MARKET_DATA_READ_BUFFER_SIZE)
+                        paths.append(compressed)
+
+        print("%-24s %9s %9s %9s %10s %11s %10s %11s" % ("file", "disk MB", "csv MB", "read s", "read MB/s",
+                                                         "rows ev/s", "arrays s", "arrays ev/s"))
+        for path in paths:
+            if not path.is_file():
+                print("'%s' is not a regular file" % str(path), file=sys.stderr)
+                continue
+
+            start = time.perf_counter()
+            size = 0
+            with open_market_data(str(path)) as market_data:
+                block = market_data.read(MARKET_DATA_READ_BUFFER_SIZE)
+                while block:
+                    size += len(block)
+                    block = market_data.read(MARKET_DATA_READ_BUFFER_SIZE)
+            read_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with io.TextIOWrapper(open_market_data(str(path)), newline="") as market_data:
+                count = sum(len(chunk) for chunk in csv_market_event_chunks(market_data))
+            rows_time = time.perf_counter() - start
+
+            # The arrays columns are n/a if NumPy is missing or cannot load the file (the simulator reads it by rows)
+            arrays_columns = "%10s %11s" % ("n/a", "n/a")
+            if numpy is not None:
+                start = time.perf_counter()
+                try:
+                    with open_market_data(str(path)) as market_data:
+                        arrays = read_csv_market_data_arrays(market_data)
+                except ValueError as e:
+                    print("'%s' cannot be loaded into arrays: %s" % (str(path), e), file=sys.stderr)
+                else:
+                    for _ in array_market_event_chunks(arrays):
+                        pass
+                    arrays_time = time.perf_counter() - start
+                    arrays_columns = "%10.3f %11.0f" % (arrays_time, count / arrays_time)
+
+            print("%-24s %9.1f %9.1f %9.3f %10.1f %11.0f %s"
+                  % (path.name, path.stat().st_size / 1e6, size / 1e6, read_time, size / 1e6 / read_time,
+                     count / rows_time, arrays_columns))
+
+
+def convert(args) -> None:
+    """Convert market data files to binary format and match event journals to CSV."""
+    paths = args.filename or market_data_paths()
+    if not paths:
+        print("no market data files to convert", file=sys.stderr)
+        return
+
+    for path in paths:
+        if not path.is_file():
+            print("'%s' is not a regular file" % str(path), file=sys.stderr)
+            continue
+        if is_match_events_journal(str(path)):
+            csv_filename = str(path.with_suffix(".csv"))
+            count = convert_match_events(str(path), csv_filename)
+            print("converted %d match events from '%s' to '%s'" % (count, str(path), csv_filename))
+            continue
+        binary_filename = binary_market_data_filename(str(path))
+        try:
+            count = convert_market_data(str(path), binary_filename)
+        except ValueError as e:
+            print("failed to convert '%s': %s" % (str(path), e), file=sys.stderr)
+            continue
+        print("converted %d market events from '%s' to '%s'" % (count, str(path), binary_filename))
+
+
+def market_data_paths() -> List[pathlib.Path]:
+    """Return the (possibly compressed) CSV market data files in the data directory."""
+    data = pathlib.Path("data")
+    return sorted(p for pattern in ["*.csv"] + ["*.csv" + s for s in COMPRESSED_MARKET_DATA_OPENERS]
+                  for p in data.glob(pattern))
+
+
+def mix(text: str) -> Tuple[float, float, float]:
+    """Parse the proportions of inserts, amends and cancels from a string like '50:10:40'."""
+    proportions = tuple(float(p) for p in text.split(":"))
+    if len(proportions) != 3 or any(p < 0.0 for p in proportions) or sum(proportions) <= 0.0:
+        raise argparse.ArgumentTypeError("expected three proportions like '50:10:40'")
+    return proportions
+
+
 def no_heads_up_display() -> None:
     print("Cannot run the Ready Trader Go heads-up display. This could\n"
           "mean that the PySide6 module has not been installed. Please\n"
           "see the README.md file for more information.", file=sys.stderr)
 
 
+def positive_float(text: str) -> float:
+    """Parse a finite number that must be greater than zero."""
+    value = float(text)
+    if not 0.0 < value < math.inf:
+        raise argparse.ArgumentTypeError("expected a finite number greater than zero")
+    return value
+
+
+def positive_int(text: str) -> int:
+    """Parse a whole number that must be greater than zero."""
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("expected a whole number greater than zero")
+    return value
+
+
 def replay(args) -> None:
     """Replay a match from a file."""
     if hud_replay is None:
@@ -93,6 +226,16 @@ def run(args) -> None:
             hud_main(args.host, args.port)
 
 
+def synth(args) -> None:
+    """Write a file of synthetic market data."""
+    events = SyntheticMarketData(args.rate, args.duration, args.depth, args.seed, args.mix)
+    if args.filename.suffix.lower() == BINARY_MARKET_DATA_SUFFIX:
+        count = write_binary_market_data(events, str(args.filename))
+    else:
+        count = write_csv_market_data(events, str(args.filename))
+    print("wrote %d market events to '%s'" % (count, str(args.filename)))
+
+
 def main() -> None:
     """Process command line arguments and execute the given command."""
     parser = argparse.ArgumentParser(description="Ready Trader Go command line utility.")
@@ -116,10 +259,51 @@ def main() -> None:
                                                        " a match events file."),
                                           help="replay a Ready Trader Go match from a file")
     replay_parser.add_argument("filename", nargs="?", default=pathlib.Path("match_events.csv"),
-                               help="name of the match events file to replay (default 'match_events.csv')",
+                               help=("name of the match events file, or segmented match events index file, to replay "
+                                     "(default 'match_events.csv')"),
                                type=pathlib.Path)
     replay_parser.set_defaults(func=replay)
 
+    convert_parser = subparsers.add_parser("convert", aliases=["co"],
+                                           description=("Convert market data files to a binary format that the "
+                                                        "exchange simulator can read more quickly, or binary "
+                                                        "match events files to CSV."),
+                                           help="convert market data files to binary format")
+    convert_parser.add_argument("filename", nargs="*", type=pathlib.Path,
+                                help=("names of the market data or binary match events files to convert "
+                                      "(default 'data/*.csv*')"))
+    convert_parser.set_defaults(func=convert)
+
+    benchmark_parser = subparsers.add_parser("benchmark", aliases=["be"],
+                                             description=("Measure how quickly market data files can be "
+                                                          "decompressed and parsed."),
+                                             help="measure how quickly market data files can be read")
+    benchmark_parser.add_argument("--compress", action="store_true",
+                                  help="also benchmark bz2, gzip and xz compressed copies of uncompressed files")
+    benchmark_parser.add_argument("filename", nargs="*", type=pathlib.Path,
+                                  help="names of the market data files to benchmark (default 'data/*.csv*')")
+    benchmark_parser.set_defaults(func=benchmark)
+
+    synth_parser = subparsers.add_parser("synth", aliases=["sy"],
+                                         description=("Write a file of random market data, for example to test the "
+                                                      "exchange simulator under load. The file is written in binary "
+                                                      "format if its name ends in '.bin' and in CSV format (which "
+                                                      "may be compressed) otherwise."),
+                                         help="write a file of synthetic market data")
+    synth_parser.add_argument("--rate", default=200.0, type=positive_float,
+                              help="average number of market events per second (default 200)")
+    synth_parser.add_argument("--duration", default=3600.0, type=positive_float,
+                              help="number of seconds of market data (default 3600)")
+    synth_parser.add_argument("--depth", default=10, type=positive_int,
+                              help="number of price levels on each side of each order book (default 10)")
+    synth_parser.add_argument("--mix", default=(50.0, 10.0, 40.0), type=mix,
+                              help="proportions of inserts, amends and cancels (default '50:10:40')")
+    synth_parser.add_argument("--seed", default=None, type=int,
+                              help="seed for the random number generator (default is random)")
+    synth_parser.add_argument("filename", type=pathlib.Path,
+                              help="name of the market data file to write")
+    synth_parser.set_defaults(func=synth)
+
     args = parser.parse_args()
     args.func(args)
 